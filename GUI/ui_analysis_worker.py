@@ -0,0 +1,146 @@
+import os
+import traceback
+
+from PyQt6.QtCore import QObject, QThread, QEventLoop, Qt, pyqtSignal, pyqtSlot
+from PyQt6.QtWidgets import QProgressDialog
+
+import freezy
+
+
+class AnalysisCancelled(Exception):
+    pass
+
+
+class StageWorker(QObject):
+    # Runs analysis steps [(label, function), ...] off the GUI thread. Each function gets 'check_cancelled', so a
+    # step can also be cancelled between the blocks of a file being read.
+    stage = pyqtSignal(str, int, int)  # label, step, n_steps
+    finished = pyqtSignal()
+
+    def __init__(self, steps):
+        super().__init__()
+
+        self.steps = steps
+        self.cancelled = False
+        self.results = None  # Return values of the steps; None if cancelled or failed
+        self.error = None  # Traceback if a step failed
+
+    def cancel(self):
+        self.cancelled = True
+
+    def check_cancelled(self, *args):
+        # Also usable as 'block_callback' of freezy.Pipeline.data
+        if self.cancelled:
+            raise AnalysisCancelled()
+
+    def run(self):
+        results = []
+        try:
+            for i, (label, function) in enumerate(self.steps):
+                self.check_cancelled()
+                self.stage.emit(label, i, len(self.steps))
+                results.append(function(self.check_cancelled))
+            self.results = results
+        except AnalysisCancelled:
+            pass
+        except Exception:
+            self.error = traceback.format_exc()
+        self.finished.emit()
+
+
+class BatchWorker(QObject):
+    # Runs freezy.run_batch off the GUI thread; cancellation stops running files at their next stage or block
+    progress = pyqtSignal(int, int, str)  # n_done, n_total, path
+    stage = pyqtSignal(str, str)  # path, stage
+    finished = pyqtSignal()
+
+    def __init__(self, paths, parameters, **kwargs):
+        super().__init__()
+
+        self.paths = paths
+        self.parameters = parameters
+        self.kwargs = kwargs  # Keyword arguments of freezy.run_batch
+        self.cancelled = False
+        self.results = None  # Results so far if cancelled
+        self.error = None
+
+    def cancel(self):
+        self.cancelled = True
+
+    def report_progress(self, n_done, n_total, result):
+        self.progress.emit(n_done, n_total, result['path'])
+
+    def run(self):
+        results = []
+        try:
+            for result in freezy.iter_batch(self.paths, self.parameters, progress_callback=self.report_progress,
+                                            stage_callback=self.stage.emit, should_stop=lambda: self.cancelled,
+                                            **self.kwargs):
+                results.append(result)
+        except Exception:
+            self.error = traceback.format_exc()
+        self.results = results
+        self.finished.emit()
+
+
+class WorkerProgressDialog(QProgressDialog):
+    # Progress of a worker; slots run on the GUI thread
+    def __init__(self, parent, title, maximum):
+        super().__init__(title, "Cancel", 0, maximum, parent)
+
+        self.setWindowTitle("Processing")
+        self.setWindowModality(Qt.WindowModality.WindowModal)
+        self.setMinimumDuration(0)  # 바로 표시
+        self.setAutoClose(False)
+        self.setAutoReset(False)
+        self.file_stages = {}  # Running files -> stage
+        self.n_done = 0
+
+    @pyqtSlot(str, int, int)
+    def show_stage(self, label, step, n_steps):
+        self.setLabelText(label)
+        self.setValue(step)
+
+    @pyqtSlot(int, int, str)
+    def show_progress(self, n_done, n_total, path):
+        self.file_stages.pop(path, None)
+        self.n_done = n_done
+        self.setValue(n_done)
+        self.show_file_stages()
+
+    @pyqtSlot(str, str)
+    def show_file_stage(self, path, stage):
+        self.file_stages[path] = stage
+        self.show_file_stages()
+
+    def show_file_stages(self):
+        # Latest stages of the running files
+        running = [f"{os.path.basename(path)}: {stage}" for path, stage in list(self.file_stages.items())[-4:]]
+        self.setLabelText('\n'.join([f"Processing {self.n_done} / {self.maximum()}"] + running))
+
+
+def run_worker(parent, worker, dialog):
+    # Run worker in a QThread. A local event loop keeps the window responsive until the worker finishes; Cancel
+    # sets the worker's flag directly, since the worker's own thread is busy.
+    thread = QThread(parent)
+    worker.moveToThread(thread)
+    thread.started.connect(worker.run)
+
+    loop = QEventLoop()
+    worker.finished.connect(loop.quit)
+    dialog.canceled.connect(worker.cancel, Qt.ConnectionType.DirectConnection)
+    if isinstance(worker, BatchWorker):
+        worker.progress.connect(dialog.show_progress)
+        worker.stage.connect(dialog.show_file_stage)
+    else:
+        worker.stage.connect(dialog.show_stage)
+
+    dialog.show()
+    thread.start()
+    loop.exec()
+
+    thread.quit()
+    thread.wait()
+    thread.deleteLater()
+    dialog.close()
+    return worker
@@ -4,14 +4,12 @@ import sys
 from PyQt6.QtCore import *
 from PyQt6.QtWidgets import *
 from PyQt6.QtGui import *
-from PyQt6.QtWebEngineWidgets import *
 
-import plotly.express as px
-import plotly.graph_objects as go
 import numpy as np
 import pandas as pd
 
 import freezy
+import ui_plot
 
 
 class BuildProtocolWidget(QWidget):
@@ -44,14 +42,6 @@ class BuildProtocolWidget(QWidget):
         self.x_list = []
         self.y_list = []
 
-        # Preset figure
-        self.fig = go.Figure()
-        self.fig.update_xaxes(range=[0, 60], showgrid=True)
-        self.fig.update_xaxes(title='Time (s)')
-        self.fig.update_yaxes(range=[0, 10], showgrid=True)
-        self.fig.update_yaxes(title='Protocol')
-        self.fig.update_layout(margin=dict(l=20, r=20, t=20, b=20))
-
     def init_build_protocol(self):
         build_protocol_set_parameters_label = QLabel('1. Set protocol parameters')  # Labels
         build_protocol_baseline_label = QLabel('Set baseline duration [s]: ')
@@ -87,9 +77,8 @@ class BuildProtocolWidget(QWidget):
         self.build_protocol_post_hold_duration_lineEdit.setValidator(QIntValidator())
         self.build_protocol_post_hold_duration_lineEdit.textChanged.connect(self.action_update_post_hold_duration)
 
-        self.protocol_plot_webEngine = QWebEngineView()  # Plot: WebEngineViews
-        self.protocol_plot_webEngine.setHtml(
-            self.fig.to_html(include_plotlyjs='cdn'))  # Include figure on WebEngineView
+        self.protocol_plot = ui_plot.PlotWidget('Time (s)', 'Protocol')  # Plot
+        self.reset_protocol_plot()  # Preset figure
 
         self.build_protocol_add_protocol_button = QPushButton('Add Protocol')  # Buttons
         self.build_protocol_add_protocol_button.clicked.connect(self.action_add_protocol)
@@ -146,7 +135,7 @@ class BuildProtocolWidget(QWidget):
         build_protocol_layout.addLayout(post_hold_duration_subLayout)
         build_protocol_layout.addWidget(h_line_1)
         build_protocol_layout.addWidget(build_protocol_build_protocol_label)
-        build_protocol_layout.addWidget(self.protocol_plot_webEngine)
+        build_protocol_layout.addWidget(self.protocol_plot)
         build_protocol_layout.addLayout(build_protocol_subLayout)
         build_protocol_layout.addWidget(h_line_2)
         build_protocol_layout.addLayout(terminate_build_protocol_subLayout)
@@ -209,20 +198,17 @@ class BuildProtocolWidget(QWidget):
             self.event_counts += 1
 
         # Add events
-        self.fig.add_shape(type='rect',
-                           x0=self.total_duration,
-                           y0=self.event_display_value - self.event_display_width,
-                           x1=self.total_duration + self.conditioned_stimulus,
-                           y1=self.event_display_value + self.event_display_width,
-                           line=dict(color='Grey', width=2),
-                           fillcolor='LightGrey')
+        self.protocol_plot.add_rect(x0=self.total_duration,
+                                    y0=self.event_display_value - self.event_display_width,
+                                    x1=self.total_duration + self.conditioned_stimulus,
+                                    y1=self.event_display_value + self.event_display_width,
+                                    color='grey', fill_color='lightgrey', width=2)
 
         self.protocol.append(self.conditioned_stimulus)
         self.protocol.append(self.inter_stimulus_interval)
         self.total_duration += self.conditioned_stimulus + self.inter_stimulus_interval
 
-        self.fig.update_xaxes(range=[0, self.total_duration * 1.5], showgrid=True)
-        self.protocol_plot_webEngine.setHtml(self.fig.to_html(include_plotlyjs='cdn'))  # Update plot
+        self.protocol_plot.setXRange(0, self.total_duration * 1.5, padding=0)  # Update plot
 
         # Increase event counts
         self.event_counts += 1
@@ -238,15 +224,12 @@ class BuildProtocolWidget(QWidget):
         self.event_counts = 0
 
         # Reset figure
-        self.fig = go.Figure()
-        self.fig.update_xaxes(range=[0, 60], showgrid=True)
-        self.fig.update_xaxes(title='Time (s)')
-        self.fig.update_yaxes(range=[0, 10], showgrid=True)
-        self.fig.update_yaxes(title='Protocol')
-        self.fig.update_layout(margin=dict(l=20, r=20, t=20, b=20))
-
-        # Reset figure on WebEngineView
-        self.protocol_plot_webEngine.setHtml(self.fig.to_html(include_plotlyjs='cdn'))
+        self.reset_protocol_plot()
+
+    def reset_protocol_plot(self):
+        self.protocol_plot.reset()
+        self.protocol_plot.setXRange(0, 60, padding=0)
+        self.protocol_plot.setYRange(0, 10, padding=0)
 
     def action_set_protocol(self):
         # Update given protocol
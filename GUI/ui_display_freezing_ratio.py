@@ -4,10 +4,7 @@ import sys
 from PyQt6.QtCore import *
 from PyQt6.QtWidgets import *
 from PyQt6.QtGui import *
-from PyQt6.QtWebEngineWidgets import *
 
-import plotly.express as px
-import plotly.graph_objects as go
 import numpy as np
 import pandas as pd
 
@@ -183,39 +180,34 @@ class DisplayFreezingRatioWidget(QWidget):
         self.show()
 
     def action_save_freezing_ratio(self):
-        # Make dataframe
-        setup_result = pd.DataFrame({
-            'Path': self.selected_paths[0],
-            'Bodypart (X)': self.x_bodypart,
-            'Bodypart (Y)': self.y_bodypart,
-            'Window Size': self.windowSize,
-            'Order': self.order,
-            'FPS': self.fps,
-            'Picel/cm': self.pixelPerCm
-        }, index=[0])
-        data_result = pd.DataFrame({
-            'Protocol (s)': self.protocol,
-            'Freezing Threshold (s)': self.freezing_threshold,
-            'Freezing Ratio (%)': self.freezing_ratio
-        })
-        speed_result = pd.DataFrame({
-            'Speed (cm/s)': self.speed
-        })
-        route_result = pd.DataFrame({
-            'Route (X)': self.route[0],
-            'Route (Y)': self.route[1],
-            'Smoothed Route (X)': self.smoothed_route[0],
-            'Smoothed Route (Y)': self.smoothed_route[1]
-        })
+        # Make result
+        parameters = freezy.make_parameters(
+            x_bodypart=self.x_bodypart, y_bodypart=self.y_bodypart, protocol=self.protocol,
+            window_size=self.windowSize, order=self.order, fps=self.fps, pixel_per_cm=self.pixelPerCm,
+            bin_duration=self.main_widget_handle.binDuration, freezing_threshold=self.freezing_threshold
+        )
+        result = {
+            'path': self.selected_paths[0],
+            'parameters': parameters,
+            'route': self.route,
+            'smoothed_route': self.smoothed_route,
+            'speed': self.speed,
+            'freezing_threshold': self.freezing_threshold,
+            'freezing_ratio': self.freezing_ratio
+        }
+
+        # Select file and format
+        filters = {f"{output_format.capitalize()} Files (*{extension})": output_format
+                   for output_format, (extension, _) in freezy.OUTPUT_FORMATS.items()}
+        save_path, selected_filter = QFileDialog.getSaveFileName(self, 'Save File',
+                                                                 os.path.dirname(self.selected_paths[0]),
+                                                                 filter=';;'.join(filters))
+        if not save_path:
+            return
 
         # Save file
-        save_path = QFileDialog.getSaveFileName(self, 'Save File', os.path.dirname(self.selected_paths[0]),
-                                                filter='Excel Files (*.xlsx)')
-        with pd.ExcelWriter(save_path[0]) as writer:
-            data_result.to_excel(writer, sheet_name='Data')
-            speed_result.to_excel(writer, sheet_name='Speed')
-            route_result.to_excel(writer, sheet_name='Route')
-            setup_result.to_excel(writer, sheet_name='Setup')
+        freezy.write_result(result, save_path, filters[selected_filter],
+                            frame_level=self.main_widget_handle.frame_level_action.isChecked())
 
     def closeEvent(self, event):
         message = QMessageBox.question(self, "Question", "Are you sure want to quit?",
@@ -1,13 +1,11 @@
 import os
 import sys
+import time
 
 from PyQt6.QtCore import *
 from PyQt6.QtWidgets import *
 from PyQt6.QtGui import *
-from PyQt6.QtWebEngineWidgets import *
 
-import plotly.express as px
-import plotly.graph_objects as go
 import numpy as np
 import pandas as pd
 
@@ -17,6 +15,8 @@ import ui_build_protocol
 import ui_select_freezing_threshold
 import ui_select_freezing_threshold_method
 import ui_display_freezing_ratio
+import ui_analysis_worker
+import ui_plot
 
 
 class MainWidget(QMainWindow):
@@ -41,10 +41,21 @@ class MainWidget(QMainWindow):
         self.order = 4
         self.fps = 30
         self.pixelPerCm = 26
+        self.binDuration = 1
 
         # Freezing threshold
         self.freezing_threshold = ''
         self.freezing_threshold_method = None
+        self.pooled_threshold = False
+
+        # Cache of parsed DLC files
+        self.cache_directory = os.path.join(os.path.expanduser('~'), '.freezy_cache')
+
+        # Result files
+        self.output_format = 'excel'
+
+        # Memoized analysis stages; re-running with a new threshold or protocol reuses the speed
+        self.pipeline = freezy.Pipeline()
 
         # Protocol
         self.default_protocol = [120, 30, 30, 30, 30]
@@ -71,6 +82,7 @@ class MainWidget(QMainWindow):
         setup_compute_speed_label = QLabel('3. Setup speed computing parameters')
         setup_compute_speed_fps_label = QLabel('FPS:')
         setup_compute_speed_pixelPerCm_label = QLabel('Pixel/cm:')
+        setup_compute_speed_binDuration_label = QLabel('Bin (s):')
 
         self.setup_smoothing_windowSize_lineEdit = QLineEdit()  # LineEdits
         self.setup_smoothing_windowSize_lineEdit.setPlaceholderText('window size')
@@ -86,7 +98,7 @@ class MainWidget(QMainWindow):
 
         self.setup_compute_speed_fps_lineEdit = QLineEdit()
         self.setup_compute_speed_fps_lineEdit.setPlaceholderText('fps')
-        self.setup_compute_speed_fps_lineEdit.setValidator(QIntValidator())
+        self.setup_compute_speed_fps_lineEdit.setValidator(QDoubleValidator())
         self.setup_compute_speed_fps_lineEdit.setText(str(self.fps))
         self.setup_compute_speed_fps_lineEdit.textChanged.connect(self.action_update_fps)
 
@@ -96,6 +108,12 @@ class MainWidget(QMainWindow):
         self.setup_compute_speed_pixelPerCm_lineEdit.setText(str(self.pixelPerCm))
         self.setup_compute_speed_pixelPerCm_lineEdit.textChanged.connect(self.action_update_pixelPerCm)
 
+        self.setup_compute_speed_binDuration_lineEdit = QLineEdit()
+        self.setup_compute_speed_binDuration_lineEdit.setPlaceholderText('bin duration')
+        self.setup_compute_speed_binDuration_lineEdit.setValidator(QDoubleValidator())
+        self.setup_compute_speed_binDuration_lineEdit.setText(str(self.binDuration))
+        self.setup_compute_speed_binDuration_lineEdit.textChanged.connect(self.action_update_binDuration)
+
         self.open_file_button = QPushButton('Select path')  # Buttons
         self.open_file_button.clicked.connect(self.action_select_paths)
 
@@ -110,8 +128,9 @@ class MainWidget(QMainWindow):
         self.selected_path_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         self.selected_path_table.setHorizontalHeaderLabels(['Selected paths'])
 
-        self.speed_plot_webEngine = QWebEngineView()  # Plot: WebEngineViews
-        self.freezing_ratio_plot_webEngine = QWebEngineView()
+        self.route_plot = ui_plot.PlotWidget('Coordinate X', 'Coordinate Y', legend=True)  # Plots
+        self.speed_plot = ui_plot.PlotWidget('Time (s)', 'Speed (cm/s)')
+        self.freezing_ratio_plot = ui_plot.PlotWidget('Protocol', 'Freezing (%)')
 
         # Layout
         path_button_layout = QHBoxLayout()
@@ -134,6 +153,8 @@ class MainWidget(QMainWindow):
         sub_analysis_setup_compute_speed_layout.addWidget(self.setup_compute_speed_fps_lineEdit)
         sub_analysis_setup_compute_speed_layout.addWidget(setup_compute_speed_pixelPerCm_label)
         sub_analysis_setup_compute_speed_layout.addWidget(self.setup_compute_speed_pixelPerCm_lineEdit)
+        sub_analysis_setup_compute_speed_layout.addWidget(setup_compute_speed_binDuration_label)
+        sub_analysis_setup_compute_speed_layout.addWidget(self.setup_compute_speed_binDuration_lineEdit)
 
         analysis_setup_layout = QVBoxLayout()
         analysis_setup_layout.addWidget(setup_smoothing_label)
@@ -142,9 +163,13 @@ class MainWidget(QMainWindow):
         analysis_setup_layout.addLayout(sub_analysis_setup_compute_speed_layout)
         analysis_setup_layout.addWidget(self.run_analysis_button)
 
+        sub_plot_layout = QHBoxLayout()
+        sub_plot_layout.addWidget(self.route_plot)
+        sub_plot_layout.addWidget(self.freezing_ratio_plot)
+
         plot_layout = QVBoxLayout()
-        plot_layout.addWidget(self.speed_plot_webEngine)
-        plot_layout.addWidget(self.freezing_ratio_plot_webEngine)
+        plot_layout.addWidget(self.speed_plot)
+        plot_layout.addLayout(sub_plot_layout)
 
         # Frame
         path_frame = QFrame(self)
@@ -195,6 +220,33 @@ class MainWidget(QMainWindow):
         self.model_menu = menu_bar.addMenu('&Model')
         self.help_menu = menu_bar.addMenu('&Help')
 
+        self.cache_action = QAction('Cache parsed files', self)  # Menu actions
+        self.cache_action.setCheckable(True)
+        self.cache_action.toggled.connect(self.action_toggle_cache)
+        self.edit_menu.addAction(self.cache_action)
+
+        self.incremental_action = QAction('Skip unchanged files in batch', self)
+        self.incremental_action.setCheckable(True)
+        self.edit_menu.addAction(self.incremental_action)
+
+        output_format_menu = self.edit_menu.addMenu('Output format')  # Result files of batch analysis
+        self.output_format_group = QActionGroup(self)
+        for output_format, label in [('excel', 'Excel (.xlsx)'), ('parquet', 'Parquet'), ('feather', 'Feather'),
+                                      ('npz', 'Compressed NumPy (.npz)'), ('csv', 'CSV')]:
+            output_format_action = QAction(label, self)
+            output_format_action.setCheckable(True)
+            output_format_action.setChecked(output_format == self.output_format)
+            output_format_action.setData(output_format)
+            self.output_format_group.addAction(output_format_action)
+            output_format_menu.addAction(output_format_action)
+        self.output_format_group.triggered.connect(self.action_select_output_format)
+
+        self.frame_level_action = QAction('Write frame-level route', self)
+        self.frame_level_action.setCheckable(True)
+        self.frame_level_action.setChecked(True)
+        output_format_menu.addSeparator()
+        output_format_menu.addAction(self.frame_level_action)
+
         # Status bar
         self.statusBar()
 
@@ -221,7 +273,8 @@ class MainWidget(QMainWindow):
 
     def action_select_paths(self):
         # Open path selection dialog
-        selected_paths = QFileDialog.getOpenFileNames(self, 'Select files', os.getcwd())
+        selected_paths = QFileDialog.getOpenFileNames(self, 'Select files', os.getcwd(),
+                                                      filter='DLC Files (*.csv *.xlsx *.h5)')
 
         # Make path lists
         self.selected_paths = list(selected_paths[0])
@@ -237,18 +290,32 @@ class MainWidget(QMainWindow):
         if not selected_dir:
             return  # 취소 시 종료
 
-        # Make directory list
-        self.selected_paths = []
-        for root, dirs, files in os.walk(selected_dir):
-            for file in files:
-                full_path = os.path.join(root, file)
-                self.selected_paths.append(full_path)
+        # Make directory list (supported files, not the results of freezy)
+        self.selected_paths = freezy.find_dlc_files(selected_dir)
 
         # Display selected directory in table widget
         self.selected_path_table.setRowCount(len(self.selected_paths))
         self.selected_path_table.setColumnCount(1)
         [self.selected_path_table.setItem(i, 0, QTableWidgetItem(path)) for i, path in enumerate(self.selected_paths)]
 
+    def action_toggle_cache(self, checked):
+        # Serve repeated loads of the same files from the on-disk cache
+        if checked:
+            freezy.set_cache(self.cache_directory)
+        else:
+            freezy.set_cache(None)
+
+    def action_select_output_format(self, action):
+        self.output_format = action.data()
+
+    def show_cache_stats(self):
+        # Report cold and warm load times in the status bar
+        stats = freezy.cache_stats()
+        if stats['hits'] + stats['misses'] == 0:
+            return
+        self.statusBar().showMessage(f"Cache: {stats['misses']} cold loads ({stats['cold_seconds']:.2f} s), "
+                                     f"{stats['hits']} warm loads ({stats['warm_seconds']:.2f} s)")
+
     def action_update_windowSize(self):
         # Update changed text
         try:
@@ -266,7 +333,7 @@ class MainWidget(QMainWindow):
     def action_update_fps(self):
         # Update changed text
         try:
-            self.fps = int(self.setup_compute_speed_fps_lineEdit.text())
+            self.fps = float(self.setup_compute_speed_fps_lineEdit.text())
         except:
             self.fps = 0  # Reset value
 
@@ -277,41 +344,45 @@ class MainWidget(QMainWindow):
         except:
             self.pixelPerCm = 0  # Reset value
 
-    def _save_freezing_ratio_to_excel(self, save_path, original_path):
-        # Make dataframe
-        setup_result = pd.DataFrame({
-            'Path': original_path,
-            'Bodypart (X)': self.x_bodypart,
-            'Bodypart (Y)': self.y_bodypart,
-            'Window Size': self.windowSize,
-            'Order': self.order,
-            'FPS': self.fps,
-            'Pixel/cm': self.pixelPerCm
-        }, index=[0])
-
-        data_result = pd.DataFrame({
-            'Protocol (s)': self.protocol,
-            'Freezing Threshold (cm/s)': self.freezing_threshold,
-            'Freezing Ratio (%)': self.freezing_ratio
-        })
-
-        speed_result = pd.DataFrame({
-            'Speed (cm/s)': self.speed
-        })
-
-        route_result = pd.DataFrame({
-            'Route (X)': self.route[0],
-            'Route (Y)': self.route[1],
-            'Smoothed Route (X)': self.smoothed_route[0],
-            'Smoothed Route (Y)': self.smoothed_route[1]
-        })
-
-        # Save file
-        with pd.ExcelWriter(save_path) as writer:
-            data_result.to_excel(writer, sheet_name='Data', index=False)
-            speed_result.to_excel(writer, sheet_name='Speed', index=False)
-            route_result.to_excel(writer, sheet_name='Route', index=False)
-            setup_result.to_excel(writer, sheet_name='Setup', index=False)
+    def action_update_binDuration(self):
+        # Update changed text
+        try:
+            self.binDuration = float(self.setup_compute_speed_binDuration_lineEdit.text())
+        except:
+            self.binDuration = 0  # Reset value
+
+    def _make_batch_parameters(self):
+        return freezy.make_parameters(
+            x_bodypart=self.x_bodypart, y_bodypart=self.y_bodypart, protocol=self.protocol,
+            window_size=self.windowSize, order=self.order, fps=self.fps, pixel_per_cm=self.pixelPerCm,
+            bin_duration=self.binDuration, freezing_threshold_method=self.freezing_threshold_method,
+            freezing_threshold=self.freezing_threshold if self.freezing_threshold_method == 'manual' else None,
+            pooled_threshold=self.pooled_threshold, output_format=self.output_format,
+            frame_level=self.frame_level_action.isChecked(),
+            cache_directory=self.cache_directory if self.cache_action.isChecked() else None
+        )
+
+    def _run_steps(self, steps):
+        # Run analysis steps on a worker thread with a cancellable progress dialog; None if cancelled or failed
+        worker = ui_analysis_worker.StageWorker(steps)
+        dialog = ui_analysis_worker.WorkerProgressDialog(self, steps[0][0], len(steps))
+        ui_analysis_worker.run_worker(self, worker, dialog)
+
+        if worker.error is not None:
+            QMessageBox.warning(self, 'Analysis Error', worker.error.strip().splitlines()[-1])
+        return worker.results
+
+    def _read_step(self, path):
+        return (f"Reading {os.path.basename(path)}",
+                lambda check_cancelled: self.pipeline.data(path, block_callback=check_cancelled))
+
+    def _speed_steps(self, path, parameters):
+        return [(f"Making route: {os.path.basename(path)}",
+                 lambda check_cancelled: self.pipeline.stage('route', path, parameters)),
+                (f"Smoothing route: {os.path.basename(path)}",
+                 lambda check_cancelled: self.pipeline.stage('smoothed_route', path, parameters)),
+                (f"Computing speed: {os.path.basename(path)}",
+                 lambda check_cancelled: self.pipeline.stage('speed', path, parameters))]
 
     def action_run_analysis(self):
 
@@ -321,7 +392,7 @@ class MainWidget(QMainWindow):
             return
 
         # Check parameter state
-        if self.windowSize <= 0 or self.order <= 0 or self.fps <= 0 or self.pixelPerCm <= 0:
+        if self.windowSize <= 0 or self.order <= 0 or self.fps <= 0 or self.pixelPerCm <= 0 or self.binDuration <= 0:
             QMessageBox.warning(self, 'Value Error', 'Unexpected parameter.')
             return
 
@@ -332,7 +403,10 @@ class MainWidget(QMainWindow):
         if len(self.selected_paths) > 1:
             # Run analysis - for the first data
             first_path = self.selected_paths[0]
-            dlc_coordinates = freezy.extract_data(first_path)
+            steps_results = self._run_steps([self._read_step(first_path)])
+            if steps_results is None:
+                return
+            dlc_coordinates = steps_results[0]
 
             # Select bodyparts (ONCE)
             ui_select_bodyparts.SelectBodypartsWidget(
@@ -341,11 +415,6 @@ class MainWidget(QMainWindow):
             if self.x_bodypart == 'none' or self.y_bodypart == 'none':
                 return
 
-            # Extract coordinates (first file)
-            coordinates_x, coordinates_y = freezy.extract_coordinates(
-                dlc_coordinates, self.x_bodypart, self.y_bodypart
-            )
-
             # Select protocol (ONCE)
             ui_build_protocol.BuildProtocolWidget(self)
             if not self.protocol:
@@ -359,124 +428,83 @@ class MainWidget(QMainWindow):
                 return
 
             self.freezing_threshold_method = dialog.selected_mode
+            self.pooled_threshold = dialog.pooled
 
             # Select freezing threshold (ONCE)
             if self.freezing_threshold_method == 'manual':
                 # Make route & speed (first file)
-                route = freezy.make_route(coordinates_x, coordinates_y)
-                smoothed_route = freezy.smooth_route(route, window_size=self.windowSize)
-                speed = freezy.compute_speed(
-                    smoothed_route, fps=self.fps, pixel_per_cm=self.pixelPerCm
-                )
+                parameters = freezy.make_parameters(self._make_batch_parameters(), freezing_threshold=None)
+                steps_results = self._run_steps(self._speed_steps(first_path, parameters))
+                if steps_results is None:
+                    return
 
-                speed_distribution = freezy.compute_speed_distribution(speed)
+                speed_distribution = freezy.compute_speed_distribution(steps_results[-1])
                 ui_select_freezing_threshold.SelectFreezingThresholdWidget(
                     self, speed_distribution
                 )
                 if self.freezing_threshold == '':
                     return
 
-            # Run analysis - for all data
+            # Run analysis - for all data (worker processes, one result file per input)
             total = len(self.selected_paths)
 
-            # Progress dialog
-            progress = QProgressDialog("Analyzing files...", "Cancel", 0, total, self)
-            progress.setWindowTitle("Processing")
-            progress.setWindowModality(Qt.WindowModality.WindowModal)
-            progress.setMinimumDuration(0)  # 바로 표시
-            progress.show()
+            # Manifest of previous runs in the common directory of the files
+            manifest = None
+            if self.incremental_action.isChecked():
+                manifest = os.path.join(freezy.common_directory(self.selected_paths), 'freezy_manifest.json')
 
-            for i, path in enumerate(self.selected_paths):
-
-                # Cancel check
-                if progress.wasCanceled():
-                    break
-
-                progress.setLabelText(
-                    f"Processing {i + 1} / {total}\n{os.path.basename(path)}"
-                )
-                progress.setValue(i)
-
-                # -----------------------
-                # Read data
-                dlc_coordinates = freezy.extract_data(path)
-                coordinates_x, coordinates_y = freezy.extract_coordinates(
-                    dlc_coordinates, self.x_bodypart, self.y_bodypart
-                )
+            # Worker thread drives the process pool; Cancel stops running files at once
+            worker = ui_analysis_worker.BatchWorker(
+                self.selected_paths, self._make_batch_parameters(), ordered=False, mp_context='spawn',
+                manifest=manifest
+            )
+            dialog = ui_analysis_worker.WorkerProgressDialog(
+                self, "Pooling speed of all files..." if self.pooled_threshold else "Analyzing files...", total
+            )
 
-                # Analysis
-                self.route = freezy.make_route(coordinates_x, coordinates_y)
-                self.smoothed_route = freezy.smooth_route(
-                    self.route, window_size=self.windowSize
+            start = time.perf_counter()
+            ui_analysis_worker.run_worker(self, worker, dialog)
+            results = worker.results
+            self.statusBar().showMessage(f"Batch: {len(results)} / {total} files in {time.perf_counter() - start:.1f} s"
+                                         + (" (cancelled)" if worker.cancelled else ""))
+            if worker.error is not None:
+                QMessageBox.warning(self, 'Batch Error', worker.error.strip().splitlines()[-1])
+
+            # Report failed files instead of aborting the batch
+            failed = [result for result in results if result['error'] is not None]
+            if failed:
+                QMessageBox.warning(
+                    self, 'Batch Error',
+                    f"{len(failed)} / {len(results)} files failed:\n" + '\n'.join(
+                        f"{os.path.basename(result['path'])}: {result['error'].strip().splitlines()[-1]}"
+                        for result in failed
+                    )
                 )
-                self.speed = freezy.compute_speed(
-                    self.smoothed_route, fps=self.fps, pixel_per_cm=self.pixelPerCm
+            # Cohort table, one row per file and epoch
+            summary_message = ''
+            if len(failed) < len(results) and not worker.cancelled:
+                summary_path = freezy.write_cohort_table(
+                    results, freezy.cohort_path(self.selected_paths, results[0]['parameters'])
                 )
+                summary_message = f"\nSummary: {summary_path}"
 
-                # Calculate freezing threshold
-                if self.freezing_threshold_method == 'manual':
-                    # 이미 첫 파일에서 설정됨 → 그대로 사용
-                    self.freezing_threshold = self.freezing_threshold
-                else:
-                    # speed distribution은 파일마다 계산
-                    speed_distribution = freezy.compute_speed_distribution(self.speed)
-
-                    if self.freezing_threshold_method == 'auto':
-                        self.freezing_threshold = freezy.estimate_freezing_threshold(
-                            speed_distribution, detection_threshold=0.01
-                        )
-
-                    elif self.freezing_threshold_method == 'superior_1':
-                        self.freezing_threshold = freezy.estimate_freezing_threshold(
-                            speed_distribution, detection_threshold=0.01
-                        )
-
-                    elif self.freezing_threshold_method == 'superior_5':
-                        self.freezing_threshold = freezy.estimate_freezing_threshold(
-                            speed_distribution, detection_threshold=0.05
-                        )
-
-                    elif self.freezing_threshold_method == 'superior_10':
-                        self.freezing_threshold = freezy.estimate_freezing_threshold(
-                            speed_distribution, detection_threshold=0.1
-                        )
-
-                    else:
-                        raise ValueError(f"Unknown freezing_threshold_method: {self.freezing_threshold_method}")
-
-                # Analysis continue
-                freeze_or_not = freezy.detect_freezing(
-                    self.speed, freezing_threshold=self.freezing_threshold
-                )
-                self.freezing_ratio = freezy.compute_freezing_ratio(
-                    freeze_or_not, self.protocol
-                )
-
-                # Save results
-                base_name = os.path.splitext(os.path.basename(path))[0]
-                save_path = os.path.join(
-                    os.path.dirname(path),
-                    f"{base_name}_freezy.xlsx"
-                )
-
-                self._save_freezing_ratio_to_excel(save_path, path)
-
-            progress.setValue(total)
-            progress.close()
-            QMessageBox.information(self, 'Done', 'Analysis completed for all files.')
+            n_skipped = sum(result['error'] is None and not result['stages'] for result in results)
+            QMessageBox.information(self, 'Done', f"Analysis completed for {len(results) - len(failed)} files "
+                                                  f"({n_skipped} unchanged).{summary_message}")
 
         # ----------------------- single data analysis -----------------------------------
         if len(self.selected_paths) == 1:
             # Read DLC coordinates
             ''' Now this application performs analysis for first selected data. '''
-            dlc_coordinates = freezy.extract_data(self.selected_paths[0])
+            path = self.selected_paths[0]
+            steps_results = self._run_steps([self._read_step(path)])
+            if steps_results is None:
+                return
+            dlc_coordinates = steps_results[0]
 
             # Select bodyparts
             ui_select_bodyparts.SelectBodypartsWidget(self, freezy.read_bodyparts(dlc_coordinates))
-            if self.x_bodypart != 'none' and self.y_bodypart != 'none':  # Check unfilled bodyparts
-                coordinates_x, coordinates_y = freezy.extract_coordinates(dlc_coordinates, self.x_bodypart,
-                                                                          self.y_bodypart)
-            else:
+            if self.x_bodypart == 'none' or self.y_bodypart == 'none':  # Check unfilled bodyparts
                 return
 
             # Set protocol
@@ -484,14 +512,16 @@ class MainWidget(QMainWindow):
             if not self.protocol:  # Check unfilled bodyparts
                 return
 
-                # Make 'route' with coordinates
-            self.route = freezy.make_route(coordinates_x, coordinates_y)
-
-            # Smooth route
-            self.smoothed_route = freezy.smooth_route(self.route, window_size=self.windowSize)
-
-            # Compute speed
-            self.speed = freezy.compute_speed(self.smoothed_route, fps=self.fps, pixel_per_cm=self.pixelPerCm)
+            # Make route, smooth route and compute speed (memoized, on a worker thread)
+            parameters = freezy.make_parameters(
+                x_bodypart=self.x_bodypart, y_bodypart=self.y_bodypart, protocol=self.protocol,
+                window_size=self.windowSize, order=self.order, fps=self.fps, pixel_per_cm=self.pixelPerCm,
+                bin_duration=self.binDuration
+            )
+            steps_results = self._run_steps(self._speed_steps(path, parameters))
+            if steps_results is None:
+                return
+            self.route, self.smoothed_route, self.speed = steps_results
 
             # Select freezing threshold
             speed_distribution = freezy.compute_speed_distribution(self.speed)
@@ -499,15 +529,16 @@ class MainWidget(QMainWindow):
             if self.freezing_threshold == '':  # Check unfilled freezing threshold
                 return
 
-            # Detect freezing
-            freeze_or_not = freezy.detect_freezing(self.speed, freezing_threshold=self.freezing_threshold)
-
-            # Calculate freezing ratio for the protocol
-            self.freezing_ratio = freezy.compute_freezing_ratio(freeze_or_not, self.protocol)
+            # Detect freezing and calculate freezing ratio for the protocol
+            parameters['freezing_threshold'] = self.freezing_threshold
+            self.freezing_ratio = self.pipeline.stage('freezing_ratio', path, parameters)
 
             # Display results
+            self.show_cache_stats()
+            self.plot_route()
             self.plot_speed()
             self.plot_freezing_ratio()
+            self.show_render_times()
             ui_display_freezing_ratio.DisplayFreezingRatioWidget(self, self.selected_paths, self.x_bodypart,
                                                                  self.y_bodypart, self.windowSize, self.order, self.fps,
                                                                  self.pixelPerCm, self.freezing_threshold,
@@ -532,6 +563,7 @@ class MainWidget(QMainWindow):
 
         # Freezing threshold
         self.freezing_threshold = ''
+        self.pooled_threshold = False
 
         # Protocol
         self.default_protocol = [120, 30, 30, 30, 30]
@@ -545,30 +577,31 @@ class MainWidget(QMainWindow):
 
     # %% Application utility functions
     def plot_route(self):
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(x=self.route[0], y=self.route[1], opacity=0.7, mode='lines+markers', name='Route'))
-        fig.add_trace(
-            go.Scatter(x=self.smoothed_route[0], y=self.smoothed_route[1], opacity=0.3, mode='lines+markers',
-                       name='Smoothed route'))
-        fig.update_xaxes(title='Coordinate X')
-        fig.update_yaxes(title='Coordinate Y')
-        fig.update_layout(margin=dict(l=20, r=20, t=20, b=20), legend=dict(yanchor='top', xanchor='right'))
-        self.route_plot_webEngine.setHtml(fig.to_html(include_plotlyjs='cdn'))
+        self.route_plot.begin()
+        self.route_plot.plot_line(self.route[0], self.route[1], name='Route', opacity=0.7)
+        self.route_plot.plot_line(self.smoothed_route[0], self.smoothed_route[1], name='Smoothed route',
+                                  color='orangered', opacity=0.3)
+        self.route_plot.end()
 
     def plot_speed(self):
-        fig = px.line(y=self.speed)
-        fig.update_xaxes(title='Time (s)')
-        fig.update_yaxes(title='Speed (cm/s)')
-        fig.update_layout(margin=dict(l=20, r=20, t=20, b=20))
-        self.speed_plot_webEngine.setHtml(fig.to_html(include_plotlyjs='cdn'))
+        self.speed_plot.begin()
+        self.speed_plot.plot_line(np.arange(len(self.speed)) * self.binDuration, self.speed)
+        self.speed_plot.end()
 
     def plot_freezing_ratio(self):
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(y=self.freezing_ratio, mode='lines+markers'))
-        fig.update_xaxes(title='Protocol')
-        fig.update_yaxes(title='Freezing (%)', range=[-5, 110], dtick=25)
-        fig.update_layout(margin=dict(l=20, r=20, t=20, b=20))
-        self.freezing_ratio_plot_webEngine.setHtml(fig.to_html(include_plotlyjs='cdn'))
+        self.freezing_ratio_plot.begin()
+        self.freezing_ratio_plot.plot_line(None, self.freezing_ratio, markers=True)
+        self.freezing_ratio_plot.setYRange(-5, 110, padding=0)
+        self.freezing_ratio_plot.set_ticks('left', range(0, 101, 25))
+        self.freezing_ratio_plot.end()
+
+    def show_render_times(self):
+        # Report plot times next to the cache stats in the status bar
+        plots = {'route': self.route_plot, 'speed': self.speed_plot, 'ratio': self.freezing_ratio_plot}
+        times = ', '.join(f"{name} {plot.n_drawn} / {plot.n_points} points in {plot.render_time * 1000:.0f} ms"
+                          for name, plot in plots.items())
+        message = self.statusBar().currentMessage()
+        self.statusBar().showMessage(f"{message} | Plots: {times}" if message else f"Plots: {times}")
 
 
 # %% main executor
@@ -0,0 +1,218 @@
+import time
+
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QColor
+from PyQt6.QtWidgets import QGraphicsRectItem
+
+import numpy as np
+import pyqtgraph as pg
+
+pg.setConfigOptions(background='w', foreground='k')
+
+# Line styles of plotly's 'line_dash'
+LINE_STYLES = {
+    'solid': Qt.PenStyle.SolidLine,
+    'dash': Qt.PenStyle.DashLine,
+    'dot': Qt.PenStyle.DotLine
+}
+
+# Lines longer than this many points per pixel of plot width are decimated
+POINTS_PER_PIXEL = 2
+
+
+def minmax_indices(values, n_bins):
+    # Parameters
+    # values [list]: 1D arrays of the same length, e.g. [y] for a time series or [x, y] for a route.
+    # n_bins [int]: Number of index buckets, e.g. the plot width in pixels.
+
+    # Return
+    # indices [ndarr, 1D]: Sorted indices of the first, the last and the minimum and maximum of every array in each
+    #                      bucket. Drawn as a line, they cover the same pixels as all points.
+
+    n = len(values[0])
+    size = int(np.ceil(n / max(n_bins, 1)))
+    if size <= POINTS_PER_PIXEL:
+        return np.arange(n)
+
+    # Equal buckets of 'size' points; the last bucket may be shorter
+    n_full = n // size * size
+    starts = np.arange(0, n_full, size)
+    indices = [np.array([0, n - 1])]
+    for value in values:
+        buckets = value[:n_full].reshape(-1, size)
+        indices.append(starts + np.argmin(buckets, axis=1))
+        indices.append(starts + np.argmax(buckets, axis=1))
+        if n_full < n:
+            indices.append(n_full + np.array([np.argmin(value[n_full:]), np.argmax(value[n_full:])]))
+    return np.unique(np.concatenate(indices))
+
+
+def decimate_series(x, y, x_range, n_bins):
+    # Parameters
+    # x [ndarr, 1D]: Ascending x values.
+    # y [ndarr, 1D]: Y values.
+    # x_range [tuple]: Visible (x_min, x_max); None for all.
+    # n_bins [int]: Plot width in pixels.
+
+    # Return
+    # x, y [ndarr, 1D]: Min/max decimated points in view and one point beyond each edge.
+
+    start, stop = 0, len(x)
+    if x_range is not None:
+        start, stop = np.searchsorted(x, x_range)
+        start, stop = max(start - 1, 0), min(stop + 1, len(x))
+
+    indices = start + minmax_indices([y[start:stop]], n_bins)
+    return x[indices], y[indices]
+
+
+def decimate_path(x, y, view_range, n_bins):
+    # Parameters
+    # x, y [ndarr, 1D]: Coordinates of a path in time order, e.g. a route.
+    # view_range [tuple]: Visible ((x_min, x_max), (y_min, y_max)); None for all.
+    # n_bins [int]: Plot width in pixels.
+
+    # Return
+    # x, y [ndarr, 1D]: Decimated points in view; the extremes of x and y of each bucket keep the covered area.
+    # connect [ndarr, 1D]: Whether each point is connected to the next; False where the path leaves the view.
+
+    if view_range is None:
+        indices = minmax_indices([x, y], n_bins)
+        return x[indices], y[indices], np.ones(len(indices), dtype=bool)
+
+    # Points in view and their neighbors, so segments crossing the edge are drawn
+    (x_min, x_max), (y_min, y_max) = view_range
+    visible = (x >= x_min) & (x <= x_max) & (y >= y_min) & (y <= y_max)
+    visible[:-1] |= visible[1:]
+    visible[1:] |= visible[:-1]
+    visible_indices = np.flatnonzero(visible)
+    if len(visible_indices) == 0:
+        return x[:0], y[:0], np.zeros(0, dtype=bool)
+
+    indices = visible_indices[minmax_indices([x[visible_indices], y[visible_indices]], n_bins)]
+
+    # Do not join separate visits of the view
+    runs = np.cumsum(~visible)[indices]
+    connect = np.append(runs[1:] == runs[:-1], False)
+    return x[indices], y[indices], connect
+
+
+class PlotWidget(pg.PlotWidget):
+    # Native plot drawn by Qt. Unlike plotly HTML in a QWebEngineView it needs no Chromium process, no JSON copy of
+    # the data and no network access to the plotly CDN. Long lines are min/max decimated to the plot width and
+    # refined for the visible range after zooming or panning, so drawing does not grow with recording length.
+    def __init__(self, x_label='', y_label='', legend=False, parent=None):
+        # Parameters
+        # x_label [str, Default='']: Title of x-axis.
+        # y_label [str, Default='']: Title of y-axis.
+        # legend [bool, Default=False]: Show names of the lines.
+
+        super().__init__(parent=parent)
+
+        self.setLabel('bottom', x_label)
+        self.setLabel('left', y_label)
+        self.showGrid(x=True, y=True, alpha=0.3)
+        if legend:
+            self.addLegend(offset=(-10, 10))  # Top right
+
+        self.n_points = 0  # Points of the last plot
+        self.n_drawn = 0  # Points drawn after decimation
+        self.render_time = 0.0  # Seconds of the last plot, from 'begin' to painted
+        self._start = time.perf_counter()
+        self._lines = []  # (item, x, y, is_path) with full data
+
+        # Refine decimation on zoom, pan and resize (at most 30 times per second)
+        view_box = self.getViewBox()
+        self._range_proxy = pg.SignalProxy(view_box.sigRangeChanged, rateLimit=30, slot=self.refine)
+        self._resize_proxy = pg.SignalProxy(view_box.sigResized, rateLimit=30, slot=self.refine)
+
+    def reset(self):
+        # Remove every item and the full data of the lines. Not named 'clear': pg.PlotWidget binds the PlotItem's
+        # 'clear' on the instance, which would shadow an override.
+        self.plotItem.clear()
+        self._lines = []
+        self.n_points = 0
+        self.n_drawn = 0
+
+    def begin(self):
+        # Clear plot and start timing
+        self._start = time.perf_counter()
+        self.reset()
+
+    def end(self):
+        # Return
+        # render_time [float]: Seconds since 'begin', including the paint of the plot.
+
+        self.viewport().repaint()  # Paint now, so the timing covers drawing
+        self.render_time = time.perf_counter() - self._start
+        return self.render_time
+
+    def plot_line(self, x, y, name=None, color='royalblue', width=1, line_dash='solid', markers=False, opacity=1.0):
+        # Parameters
+        # x [array-like, 1D]: X values; None for 0, 1, 2, ...
+        # y [array-like, 1D]: Y values.
+        # name [str, Default=None]: Name in the legend.
+        # color [str, Default='royalblue']: SVG color name.
+        # width [int, Default=1]: Line width (px).
+        # line_dash [str, Default='solid']: Key of LINE_STYLES.
+        # markers [bool, Default=False]: Draw a marker at each point.
+        # opacity [float, Default=1.0]: Opacity of the line.
+
+        y = np.asarray(y, dtype=float)
+        x = np.arange(len(y), dtype=float) if x is None else np.asarray(x, dtype=float)
+
+        # X not ascending (e.g. a route): decimate as a path
+        is_path = bool(np.any(np.diff(x) < 0))
+
+        pen = pg.mkPen(QColor(color), width=width, style=LINE_STYLES[line_dash])
+        options = dict(symbol='o', symbolSize=5, symbolPen=pen, symbolBrush=QColor(color)) if markers else {}
+        item = self.plot(pen=pen, name=name, **options)
+        item.setOpacity(opacity)
+        self._lines.append((item, x, y, is_path))
+        self.n_points += len(y)
+        self._draw_line(item, x, y, is_path, None)
+        return item
+
+    def _n_bins(self):
+        return max(int(self.getViewBox().width()), 100)
+
+    def _draw_line(self, item, x, y, is_path, view_range):
+        if is_path:
+            x_drawn, y_drawn, connect = decimate_path(x, y, view_range, self._n_bins())
+        else:
+            x_drawn, y_drawn = decimate_series(x, y, None if view_range is None else view_range[0], self._n_bins())
+            connect = 'all'
+        self.n_drawn += len(y_drawn) - len(item.yData if item.yData is not None else ())
+        item.setData(x_drawn, y_drawn, connect=connect)
+
+    def refine(self, *args):
+        # Decimate lines again for the visible range and plot width
+        view_box = self.getViewBox()
+        view_range = None if all(view_box.autoRangeEnabled()) else view_box.viewRange()
+        for item, x, y, is_path in self._lines:
+            if len(y) > POINTS_PER_PIXEL * self._n_bins():
+                self._draw_line(item, x, y, is_path, view_range)
+
+    def add_hline(self, y, color='grey', line_dash='dash', text=None, text_position='top'):
+        # Parameters
+        # y [float]: Y value of the line.
+        # text [str, Default=None]: Annotation at the right end of the line.
+        # text_position [str, Default='top']: 'top' or 'bottom' of the line.
+
+        anchor = (1, 1) if text_position == 'top' else (1, 0)
+        line = pg.InfiniteLine(pos=y, angle=0, pen=pg.mkPen(QColor(color), style=LINE_STYLES[line_dash]), label=text,
+                               labelOpts={'position': 0.98, 'color': QColor(color), 'anchors': [anchor, anchor]})
+        self.addItem(line)
+        return line
+
+    def add_rect(self, x0, y0, x1, y1, color='grey', fill_color='lightgrey', width=2):
+        # Rectangle in data coordinates
+        rect = QGraphicsRectItem(x0, y0, x1 - x0, y1 - y0)
+        rect.setPen(pg.mkPen(QColor(color), width=width))
+        rect.setBrush(pg.mkBrush(QColor(fill_color)))
+        self.addItem(rect)
+        return rect
+
+    def set_ticks(self, axis, values):
+        # Fixed ticks, e.g. set_ticks('left', range(0, 101, 25))
+        self.getAxis(axis).setTicks([[(value, str(value)) for value in values]])
@@ -1,11 +1,9 @@
 from PyQt6.QtCore import *
 from PyQt6.QtWidgets import *
 from PyQt6.QtGui import *
-from PyQt6.QtWebEngineWidgets import *
-
-import plotly.graph_objects as go
 
 import freezy
+import ui_plot
 
 
 class SelectFreezingThresholdWidget(QWidget):
@@ -32,23 +30,24 @@ class SelectFreezingThresholdWidget(QWidget):
         freezing_threshold_10 = freezy.estimate_freezing_threshold(self.speed_distribution, detection_threshold=0.1)
         freezing_threshold_20 = freezy.estimate_freezing_threshold(self.speed_distribution, detection_threshold=0.2)
         freezing_threshold_50 = freezy.estimate_freezing_threshold(self.speed_distribution, detection_threshold=0.5)
-
-        # Figure
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(y=self.speed_distribution, mode='lines'))
-        fig.add_hline(y=freezing_threshold_1, line_dash='dash', line_color='green',
-                      annotation_text='Superior 1% (Recommended)')
-        fig.add_hline(y=freezing_threshold_5, line_dash='dash', line_color='blue', annotation_text='Superior 5%')
-        fig.add_hline(y=freezing_threshold_10, line_dash='dash', line_color='red', annotation_text='Superior 10%')
-        fig.add_hline(y=freezing_threshold_20, line_dash='dash', line_color='purple', annotation_text='Superior 20%')
-        fig.add_hline(y=freezing_threshold_50, line_dash='dash', line_color='grey', annotation_text='Superior 50%')
-        fig.update_xaxes(title='Timestamp (s)')
-        fig.update_yaxes(title='Speed (cm/s)')
-        fig.update_layout(margin=dict(l=20, r=20, t=20, b=20))
+        freezing_threshold_otsu = freezy.estimate_freezing_threshold_otsu(self.speed_distribution)
+        freezing_threshold_gmm = freezy.estimate_freezing_threshold_gmm(self.speed_distribution)
+        freezing_threshold_kde = freezy.estimate_freezing_threshold_kde(self.speed_distribution)
 
         # Widgets
-        speed_distribution_plot_webEngine = QWebEngineView()  # Plot: WebEngineView
-        speed_distribution_plot_webEngine.setHtml(fig.to_html(include_plotlyjs='cdn'))
+        speed_distribution_plot = ui_plot.PlotWidget('Timestamp (s)', 'Speed (cm/s)')  # Plot
+        speed_distribution_plot.plot_line(None, self.speed_distribution)
+        speed_distribution_plot.add_hline(freezing_threshold_1, color='green', text='Superior 1% (Recommended)')
+        speed_distribution_plot.add_hline(freezing_threshold_5, color='blue', text='Superior 5%')
+        speed_distribution_plot.add_hline(freezing_threshold_10, color='red', text='Superior 10%')
+        speed_distribution_plot.add_hline(freezing_threshold_20, color='purple', text='Superior 20%')
+        speed_distribution_plot.add_hline(freezing_threshold_50, color='grey', text='Superior 50%')
+        speed_distribution_plot.add_hline(freezing_threshold_otsu, color='orange', line_dash='dot', text='Otsu',
+                                          text_position='bottom')
+        speed_distribution_plot.add_hline(freezing_threshold_gmm, color='brown', line_dash='dot', text='GMM',
+                                          text_position='bottom')
+        speed_distribution_plot.add_hline(freezing_threshold_kde, color='black', line_dash='dot', text='KDE valley',
+                                          text_position='bottom')
 
         select_freezing_threshold_speed_distribution = QLabel('Speed distribution')  # Label
         select_freezing_threshold_estimation_label = QLabel('Freezing threshold estimation:')
@@ -58,6 +57,9 @@ class SelectFreezingThresholdWidget(QWidget):
         select_freezing_threshold_10_label = QLabel('Superior 10 %:')
         select_freezing_threshold_20_label = QLabel('Superior 20 %:')
         select_freezing_threshold_50_label = QLabel('Superior 50 %:')
+        select_freezing_threshold_otsu_label = QLabel('Otsu:')
+        select_freezing_threshold_gmm_label = QLabel('Gaussian mixture:')
+        select_freezing_threshold_kde_label = QLabel('KDE valley:')
 
         self.select_freezing_threshold_editField = QLineEdit()  # LineEdit
         self.select_freezing_threshold_editField.setPlaceholderText('Select freezing threshold.')
@@ -84,6 +86,18 @@ class SelectFreezingThresholdWidget(QWidget):
         select_freezing_threshold_50_lineEdit.setText(str(freezing_threshold_50))
         select_freezing_threshold_50_lineEdit.setReadOnly(True)
 
+        select_freezing_threshold_otsu_lineEdit = QLineEdit()
+        select_freezing_threshold_otsu_lineEdit.setText(str(freezing_threshold_otsu))
+        select_freezing_threshold_otsu_lineEdit.setReadOnly(True)
+
+        select_freezing_threshold_gmm_lineEdit = QLineEdit()
+        select_freezing_threshold_gmm_lineEdit.setText(str(freezing_threshold_gmm))
+        select_freezing_threshold_gmm_lineEdit.setReadOnly(True)
+
+        select_freezing_threshold_kde_lineEdit = QLineEdit()
+        select_freezing_threshold_kde_lineEdit.setText(str(freezing_threshold_kde))
+        select_freezing_threshold_kde_lineEdit.setReadOnly(True)
+
         select_freezing_threshold_button = QPushButton('Select Threshold')  # Button
         select_freezing_threshold_button.clicked.connect(self.action_update_freezing_threshold)
 
@@ -117,9 +131,21 @@ class SelectFreezingThresholdWidget(QWidget):
         select_freezing_threshold_50_subLayout.addWidget(select_freezing_threshold_50_label)
         select_freezing_threshold_50_subLayout.addWidget(select_freezing_threshold_50_lineEdit)
 
+        select_freezing_threshold_otsu_subLayout = QHBoxLayout()
+        select_freezing_threshold_otsu_subLayout.addWidget(select_freezing_threshold_otsu_label)
+        select_freezing_threshold_otsu_subLayout.addWidget(select_freezing_threshold_otsu_lineEdit)
+
+        select_freezing_threshold_gmm_subLayout = QHBoxLayout()
+        select_freezing_threshold_gmm_subLayout.addWidget(select_freezing_threshold_gmm_label)
+        select_freezing_threshold_gmm_subLayout.addWidget(select_freezing_threshold_gmm_lineEdit)
+
+        select_freezing_threshold_kde_subLayout = QHBoxLayout()
+        select_freezing_threshold_kde_subLayout.addWidget(select_freezing_threshold_kde_label)
+        select_freezing_threshold_kde_subLayout.addWidget(select_freezing_threshold_kde_lineEdit)
+
         select_freezing_threshold_layout = QVBoxLayout()
         select_freezing_threshold_layout.addWidget(select_freezing_threshold_speed_distribution)
-        select_freezing_threshold_layout.addWidget(speed_distribution_plot_webEngine)
+        select_freezing_threshold_layout.addWidget(speed_distribution_plot)
 
         select_freezing_threshold_layout.addWidget(h_line)  # Horizontal line
 
@@ -129,6 +155,9 @@ class SelectFreezingThresholdWidget(QWidget):
         select_freezing_threshold_layout.addLayout(select_freezing_threshold_10_subLayout)
         select_freezing_threshold_layout.addLayout(select_freezing_threshold_20_subLayout)
         select_freezing_threshold_layout.addLayout(select_freezing_threshold_50_subLayout)
+        select_freezing_threshold_layout.addLayout(select_freezing_threshold_otsu_subLayout)
+        select_freezing_threshold_layout.addLayout(select_freezing_threshold_gmm_subLayout)
+        select_freezing_threshold_layout.addLayout(select_freezing_threshold_kde_subLayout)
 
         select_freezing_threshold_layout.addWidget(h_line)  # Horizontal line
 
@@ -1,6 +1,6 @@
 from PyQt6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout,
-    QRadioButton, QPushButton, QLabel
+    QRadioButton, QPushButton, QLabel, QCheckBox
 )
 from PyQt6.QtCore import Qt
 
@@ -9,7 +9,8 @@ class SelectFreezingThresholdModeDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
 
-        self.selected_mode = None  # 'auto', '1%', '5%', '10%'
+        self.selected_mode = None  # Name in freezy.FREEZING_THRESHOLD_METHODS or 'manual'
+        self.pooled = False  # One threshold from the pooled speed of all files
         self.init_ui()
 
     def init_ui(self):
@@ -22,10 +23,18 @@ class SelectFreezingThresholdModeDialog(QDialog):
         self.radio_1 = QRadioButton("Superior 1%")
         self.radio_5 = QRadioButton("Superior 5%")
         self.radio_10 = QRadioButton("Superior 10%")
+        self.radio_quantile_5 = QRadioButton("Slowest 5% of bins (quantile)")
+        self.radio_quantile_10 = QRadioButton("Slowest 10% of bins (quantile)")
+        self.radio_quantile_25 = QRadioButton("Slowest 25% of bins (quantile)")
+        self.radio_otsu = QRadioButton("Otsu (log speed histogram)")
+        self.radio_gmm = QRadioButton("Gaussian mixture (log speed)")
+        self.radio_kde = QRadioButton("KDE valley (log speed)")
         self.radio_manual = QRadioButton("Manual")
 
         self.radio_auto.setChecked(True)
 
+        self.check_pooled = QCheckBox("Pool all files (one cohort threshold)")
+
         ok_button = QPushButton("OK")
         cancel_button = QPushButton("Cancel")
 
@@ -38,7 +47,14 @@ class SelectFreezingThresholdModeDialog(QDialog):
         layout.addWidget(self.radio_1)
         layout.addWidget(self.radio_5)
         layout.addWidget(self.radio_10)
+        layout.addWidget(self.radio_quantile_5)
+        layout.addWidget(self.radio_quantile_10)
+        layout.addWidget(self.radio_quantile_25)
+        layout.addWidget(self.radio_otsu)
+        layout.addWidget(self.radio_gmm)
+        layout.addWidget(self.radio_kde)
         layout.addWidget(self.radio_manual)
+        layout.addWidget(self.check_pooled)
 
         button_layout = QHBoxLayout()
         button_layout.addStretch()
@@ -47,7 +63,7 @@ class SelectFreezingThresholdModeDialog(QDialog):
 
         layout.addLayout(button_layout)
         self.setLayout(layout)
-        self.resize(360, 180)
+        self.resize(360, 360)
 
     def accept_selection(self):
         if self.radio_auto.isChecked():
@@ -58,7 +74,20 @@ class SelectFreezingThresholdModeDialog(QDialog):
             self.selected_mode = 'superior_5'
         elif self.radio_10.isChecked():
             self.selected_mode = 'superior_10'
+        elif self.radio_quantile_5.isChecked():
+            self.selected_mode = 'quantile_5'
+        elif self.radio_quantile_10.isChecked():
+            self.selected_mode = 'quantile_10'
+        elif self.radio_quantile_25.isChecked():
+            self.selected_mode = 'quantile_25'
+        elif self.radio_otsu.isChecked():
+            self.selected_mode = 'otsu'
+        elif self.radio_gmm.isChecked():
+            self.selected_mode = 'gmm'
+        elif self.radio_kde.isChecked():
+            self.selected_mode = 'kde'
         elif self.radio_manual.isChecked():
             self.selected_mode = 'manual'
+        self.pooled = self.check_pooled.isChecked() and self.selected_mode != 'manual'
 
         self.accept()
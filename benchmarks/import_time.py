@@ -0,0 +1,75 @@
+# Import time of freezy in fresh interpreters, e.g. a new batch worker process.
+# Run from the repository root: python benchmarks/import_time.py [--repeat 10]
+# Exits with 1 if 'import freezy' or the NumPy-only functions import pandas.
+
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Name -> (statement, pandas allowed)
+SCENARIOS = {
+    'import freezy': ('import freezy', False),
+    'speed and freezing': ('import freezy; freezy.compute_speed; freezy.detect_freezing; freezy.make_parameters',
+                           False),
+    'pipeline': ('import freezy; freezy.Pipeline', False),
+    'submodules': ('import freezy; freezy.extractor; freezy.speed; freezy.freeze; freezy.batch', False),
+    'import pandas (reference)': ('import pandas', True),
+    'every module': ('import freezy; import pandas; [getattr(freezy, name) for name in freezy.__all__]', True)
+}
+
+_MEASURE = '''
+import sys, time
+start = time.perf_counter()
+{statement}
+print(time.perf_counter() - start, 'pandas' in sys.modules)
+'''
+
+
+def measure(statement, repeat):
+    # Parameters
+    # statement [str]: Python statement, run in a fresh interpreter per repeat.
+    # repeat [int]: Number of interpreters.
+
+    # Return
+    # seconds [list]: Time of the statement in each interpreter.
+    # pandas_imported [bool]: Whether the statement imported pandas.
+
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([ROOT, os.environ.get('PYTHONPATH', '')]))
+    seconds, pandas_imported = [], False
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', _MEASURE.format(statement=statement)], env=env, check=True,
+                                capture_output=True, text=True).stdout.split()
+        seconds.append(float(output[0]))
+        pandas_imported = pandas_imported or output[1] == 'True'
+    return seconds, pandas_imported
+
+
+def _format_ms(seconds):
+    return f"{seconds * 1000:7.1f} ms"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Import time of freezy in fresh interpreters.')
+    parser.add_argument('--repeat', type=int, default=10, help='Interpreters per scenario (default 10).')
+    args = parser.parse_args(argv)
+
+    failed = []
+    for name, (statement, pandas_allowed) in SCENARIOS.items():
+        seconds, pandas_imported = measure(statement, args.repeat)
+        print(f"{name:<28} median {_format_ms(statistics.median(seconds))}, "
+              f"min {_format_ms(min(seconds))}{' (pandas)' if pandas_imported else ''}")
+        if pandas_imported and not pandas_allowed:
+            failed.append(name)
+
+    if failed:
+        print(f"pandas imported eagerly by: {', '.join(failed)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,21 +1,117 @@
-# extractor.py
-from .extractor import extract_data
-from .extractor import read_bodyparts
-from .extractor import extract_coordinates
-from .extractor import make_route
-
-# filter.py
-from .filter import savitzky_golay
-from .filter import smooth_route
-
-# speed.py
-from .speed import euclidean_distance
-from .speed import binning_distance
-from .speed import speed_per_pixel
-from .speed import compute_speed
-
-# freeze.py
-from .freeze import estimate_freezing_threshold
-from .freeze import compute_speed_distribution
-from .freeze import detect_freezing
-from .freeze import compute_freezing_ratio
+# Public names are imported from their module on first access (PEP 562), so 'import freezy' stays cheap and pandas
+# is imported only by the functions reading or writing tables. Keep benchmarks/import_time.py passing.
+import importlib
+
+# Name -> module
+_ATTRIBUTE_MODULES = {
+    # extractor.py
+    'extract_data': 'extractor',
+    'read_dlc_header': 'extractor',
+    'read_dlc_csv': 'extractor',
+    'read_dlc_excel': 'extractor',
+    'read_dlc_h5': 'extractor',
+    'SUPPORTED_EXTENSIONS': 'extractor',
+    'set_cache': 'extractor',
+    'clear_cache': 'extractor',
+    'cache_stats': 'extractor',
+    'read_bodyparts': 'extractor',
+    'extract_coordinates': 'extractor',
+    'make_route': 'extractor',
+    'iter_data': 'extractor',
+    'iter_route': 'extractor',
+
+    # filter.py
+    'savitzky_golay_coefficients': 'filter',
+    'savitzky_golay': 'filter',
+    'batch_savitzky_golay': 'filter',
+    'smooth_route': 'filter',
+    'iter_savitzky_golay': 'filter',
+    'iter_smooth_route': 'filter',
+
+    # speed.py
+    'euclidean_distance': 'speed',
+    'binning_distance': 'speed',
+    'speed_per_pixel': 'speed',
+    'compute_bin_edges': 'speed',
+    'compute_speed': 'speed',
+    'iter_compute_speed': 'speed',
+
+    # freeze.py
+    'estimate_freezing_threshold': 'freeze',
+    'estimate_freezing_threshold_quantile': 'freeze',
+    'estimate_freezing_threshold_otsu': 'freeze',
+    'estimate_freezing_threshold_gmm': 'freeze',
+    'estimate_freezing_threshold_kde': 'freeze',
+    'FREEZING_THRESHOLD_METHODS': 'freeze',
+    'estimate_freezing_threshold_by_method': 'freeze',
+    'SpeedHistogram': 'freeze',
+    'compute_speed_distribution': 'freeze',
+    'detect_freezing': 'freeze',
+    'compute_epoch_freezing_ratio': 'freeze',
+    'compute_freezing_ratio': 'freeze',
+    'compute_freezing_time_course': 'freeze',
+    'BOUT_DTYPE': 'freeze',
+    'EPOCH_BOUT_DTYPE': 'freeze',
+    'extract_freezing_bouts': 'freeze',
+    'summarize_freezing_bouts': 'freeze',
+
+    # writer.py
+    'result_tables': 'writer',
+    'table_path': 'writer',
+    'write_excel': 'writer',
+    'write_csv': 'writer',
+    'write_parquet': 'writer',
+    'write_feather': 'writer',
+    'write_npz': 'writer',
+    'OUTPUT_FORMATS': 'writer',
+    'write_result': 'writer',
+    'write_table': 'writer',
+
+    # batch.py
+    'DEFAULT_PARAMETERS': 'batch',
+    'make_parameters': 'batch',
+    'DLC_EXTENSION_PREFERENCE': 'batch',
+    'find_dlc_files': 'batch',
+    'common_directory': 'batch',
+    'result_path': 'batch',
+    'compute_file_speed': 'batch',
+    'analyze_speed': 'batch',
+    'analyze_file': 'batch',
+    'summarize_result': 'batch',
+    'cohort_table': 'batch',
+    'cohort_path': 'batch',
+    'write_cohort_table': 'batch',
+    'STAGE_PARAMETERS': 'batch',
+    'freezy_version': 'batch',
+    'hash_file': 'batch',
+    'stage_keys': 'batch',
+    'load_manifest': 'batch',
+    'save_manifest': 'batch',
+    'estimate_pooled_threshold': 'batch',
+    'iter_batch': 'batch',
+    'run_batch': 'batch',
+
+    # pipeline.py
+    'PIPELINE_STAGES': 'pipeline',
+    'Pipeline': 'pipeline'
+}
+
+# Submodules, e.g. freezy.speed.compute_speed
+_SUBMODULES = ('extractor', 'filter', 'speed', 'freeze', 'writer', 'batch', 'pipeline')
+
+__all__ = list(_ATTRIBUTE_MODULES)
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module(f".{name}", __name__)
+    if name not in _ATTRIBUTE_MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(f".{_ATTRIBUTE_MODULES[name]}", __name__), name)
+    globals()[name] = value  # Later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__) | set(_SUBMODULES))
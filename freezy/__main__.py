@@ -0,0 +1,157 @@
+import os
+import sys
+import json
+import time
+import argparse
+
+from .batch import (DEFAULT_PARAMETERS, make_parameters, find_dlc_files, cohort_path, run_batch,
+                    write_cohort_table)
+from .freeze import FREEZING_THRESHOLD_METHODS
+from .writer import OUTPUT_FORMATS
+
+# Keys of a config file besides DEFAULT_PARAMETERS
+RUN_OPTIONS = ('inputs', 'n_workers', 'chunksize', 'manifest', 'summary')
+
+
+def load_config(path):
+    # Parameter
+    # path [str]: Path of JSON or TOML config whose keys are DEFAULT_PARAMETERS and RUN_OPTIONS.
+
+    # Return
+    # config [dict]: Parsed config.
+
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.json':
+        with open(path) as f:
+            config = json.load(f)
+    elif extension == '.toml':
+        try:
+            import tomllib
+        except ImportError:
+            raise ValueError("TOML config requires Python 3.11 or later; use a JSON config.")
+        with open(path, 'rb') as f:
+            config = tomllib.load(f)
+    else:
+        raise ValueError(f"Unsupported config file: {path} (use .json or .toml)")
+
+    unknown = set(config) - set(DEFAULT_PARAMETERS) - set(RUN_OPTIONS)
+    if unknown:
+        raise KeyError(f"Unknown config keys: {sorted(unknown)}")
+    return config
+
+
+def make_parser():
+    parser = argparse.ArgumentParser(
+        prog='freezy',
+        description='Detect freezing in DLC files without the GUI. One result file is written next to each input.'
+    )
+    parser.add_argument('inputs', nargs='*', help='DLC files, directories (recursive) or glob patterns.')
+    parser.add_argument('-c', '--config', help='JSON or TOML config; command line arguments override it.')
+
+    # Bodyparts
+    parser.add_argument('-b', '--bodypart', help='Bodypart for both coordinates, e.g. nose.')
+    parser.add_argument('--x-bodypart', help='Bodypart of the x coordinate.')
+    parser.add_argument('--y-bodypart', help='Bodypart of the y coordinate.')
+
+    # Protocol
+    parser.add_argument('-p', '--protocol', type=float, nargs='+', help='Epoch durations (s), e.g. 120 30 30.')
+
+    # Smoothing and speed
+    parser.add_argument('--window-size', type=int, help=f"Savitzky-Golay window size "
+                                                        f"(default {DEFAULT_PARAMETERS['window_size']}).")
+    parser.add_argument('--order', type=int, help=f"Savitzky-Golay order (default {DEFAULT_PARAMETERS['order']}).")
+    parser.add_argument('--fps', type=float, help=f"Frames per second (default {DEFAULT_PARAMETERS['fps']}).")
+    parser.add_argument('--pixel-per-cm', type=float, help=f"Pixels per cm "
+                                                           f"(default {DEFAULT_PARAMETERS['pixel_per_cm']}).")
+    parser.add_argument('--bin-duration', type=float, help=f"Speed bin (s) "
+                                                           f"(default {DEFAULT_PARAMETERS['bin_duration']}).")
+
+    # Freezing
+    parser.add_argument('-m', '--threshold-method', dest='freezing_threshold_method',
+                        choices=list(FREEZING_THRESHOLD_METHODS), help='Freezing threshold method (default auto).')
+    parser.add_argument('-t', '--threshold', dest='freezing_threshold', type=float,
+                        help='Fixed freezing threshold (cm/s); overrides the method.')
+    parser.add_argument('--pooled', dest='pooled_threshold', action='store_true', default=None,
+                        help='One threshold from the pooled speed of all files.')
+    parser.add_argument('--min-duration', type=float, help='Shortest freezing bout (s).')
+    parser.add_argument('--max-gap', type=float, help='Longest movement merged into a freezing bout (s).')
+
+    # Run
+    parser.add_argument('-j', '--workers', dest='n_workers', type=int, help='Worker processes (default all cores).')
+    parser.add_argument('--chunksize', type=int, help='Files per submitted task (default 1).')
+    parser.add_argument('--cache', dest='cache_directory', help='Directory caching parsed DLC files.')
+    parser.add_argument('--manifest', help='Manifest (JSON) of a previous run; unchanged files are skipped and only '
+                                           'stale stages are recomputed.')
+    parser.add_argument('--summary', help='Cohort table, one row per file and epoch (default cohort_freezy.parquet '
+                                          'in the common directory of the inputs; .csv without pyarrow).')
+    parser.add_argument('--suffix', help=f"Suffix of result files (default {DEFAULT_PARAMETERS['suffix']}).")
+    parser.add_argument('-f', '--format', dest='output_format', choices=list(OUTPUT_FORMATS),
+                        help='Result file format (default excel).')
+    parser.add_argument('--no-frame-level', dest='frame_level', action='store_false', default=None,
+                        help='Omit the frame-level route from result files.')
+    parser.add_argument('--no-save', dest='save', action='store_false', default=None,
+                        help='Analyze without writing result files.')
+    parser.add_argument('-q', '--quiet', action='store_true', help='Print failures and the summary only.')
+    return parser
+
+
+def main(argv=None):
+    parser = make_parser()
+    args = parser.parse_args(argv)
+
+    # Config, then command line
+    try:
+        config = load_config(args.config) if args.config else {}
+    except (OSError, ValueError, KeyError) as e:
+        parser.error(str(e))
+
+    arguments = vars(args)
+    if args.bodypart is not None:
+        arguments['x_bodypart'] = arguments['x_bodypart'] or args.bodypart
+        arguments['y_bodypart'] = arguments['y_bodypart'] or args.bodypart
+    config.update({key: value for key, value in arguments.items()
+                   if value is not None and (key in DEFAULT_PARAMETERS or key in RUN_OPTIONS[1:])})
+    if args.inputs:
+        config['inputs'] = args.inputs
+
+    try:
+        parameters = make_parameters({key: value for key, value in config.items() if key in DEFAULT_PARAMETERS})
+    except (KeyError, ValueError) as e:
+        parser.error(str(e))
+
+    # The cohort table (or its .csv fallback, see 'write_table') and manifest of an earlier run are not inputs, even
+    # inside a scanned directory
+    exclude = [config.get('manifest')]
+    if config.get('summary') is not None:
+        exclude += [config['summary'], os.path.splitext(config['summary'])[0] + '.csv']
+    paths = find_dlc_files(config.get('inputs', []), suffix=parameters['suffix'], exclude=exclude)
+    if not paths:
+        parser.error('No DLC files found.')
+
+    def report(n_done, n_total, result):
+        if result['error'] is not None:
+            print(f"[{n_done}/{n_total}] FAILED {result['path']}\n{result['error']}", file=sys.stderr)
+        elif not args.quiet:
+            stages = ', '.join(result['stages']) or 'unchanged'
+            print(f"[{n_done}/{n_total}] {result['path']} ({stages}, {result['elapsed']:.2f} s)")
+
+    # Run
+    start = time.perf_counter()
+    results = run_batch(paths, parameters, n_workers=config.get('n_workers'), chunksize=config.get('chunksize', 1),
+                        progress_callback=report, manifest=config.get('manifest'))
+    n_failed = sum(result['error'] is not None for result in results)
+    n_skipped = sum(result['error'] is None and not result['stages'] for result in results)
+    print(f"{len(results) - n_failed} / {len(results)} files analyzed ({n_skipped} unchanged) "
+          f"in {time.perf_counter() - start:.2f} s")
+
+    # Cohort table, written once
+    summary_path = config.get('summary')
+    if summary_path is None and parameters['save']:
+        summary_path = cohort_path(paths, parameters)
+    if summary_path is not None and n_failed < len(results):
+        print(f"Summary: {write_cohort_table(results, summary_path)}")
+    return 1 if n_failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,737 @@
+import os
+import glob
+import json
+import time
+import queue
+import hashlib
+import traceback
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from .extractor import SUPPORTED_EXTENSIONS, extract_data, extract_coordinates, make_route, set_cache
+from .filter import smooth_route
+from .speed import compute_speed
+from .freeze import (estimate_freezing_threshold_by_method, detect_freezing, compute_freezing_ratio,
+                     SpeedHistogram, extract_freezing_bouts, summarize_freezing_bouts)
+from .writer import OUTPUT_FORMATS, write_result, write_table
+
+DEFAULT_PARAMETERS = {
+    'x_bodypart': None,  # Required
+    'y_bodypart': None,  # Required
+    'protocol': [120, 30, 30, 30, 30],
+    'window_size': 15,
+    'order': 4,
+    'fps': 30,
+    'pixel_per_cm': 30,
+    'bin_duration': 1,
+    'freezing_threshold_method': 'auto',
+    'freezing_threshold': None,  # Fixed threshold (cm/s); overrides the method
+    'pooled_threshold': False,  # One threshold from the pooled speed of all files
+    'min_duration': 0,
+    'max_gap': 0,
+    'cache_directory': None,  # Cache of parsed DLC files, see 'set_cache'
+    'save': True,
+    'suffix': '_freezy',
+    'output_format': 'excel',  # Name in OUTPUT_FORMATS
+    'frame_level': True  # Write the frame-level route
+}
+
+# Parameters of each stage; a stage is recomputed when its parameters or any upstream stage change
+STAGE_PARAMETERS = {
+    'speed': ('x_bodypart', 'y_bodypart', 'window_size', 'order', 'fps', 'pixel_per_cm', 'bin_duration'),
+    'freezing': ('protocol', 'freezing_threshold_method', 'freezing_threshold', 'pooled_threshold', 'min_duration',
+                 'max_gap'),
+    'output': ('save', 'suffix', 'output_format', 'frame_level')
+}
+
+MANIFEST_VERSION = 1
+
+# DLC writes the same tracking as '<name>.h5' and '<name>.csv'; one file per name is analyzed, in this preference
+DLC_EXTENSION_PREFERENCE = ('.h5', '.csv', '.xlsx')
+
+# Stage reports and stop requests of this (worker) process, see '_init_worker'
+_stage_queue = None
+_stop_event = None
+
+
+class _Stopped(Exception):
+    # Raised at the next stage or block of a file once the batch is stopped
+    pass
+
+
+def make_parameters(parameters=None, **kwargs):
+    # Parameters
+    # parameters [dict, Default=None]: Parameters overriding DEFAULT_PARAMETERS.
+    # kwargs: Parameters overriding 'parameters'.
+
+    # Return
+    # parameters [dict]: Complete parameters.
+
+    parameters = {**DEFAULT_PARAMETERS, **(parameters or {}), **kwargs}
+
+    unknown = set(parameters) - set(DEFAULT_PARAMETERS)
+    if unknown:
+        raise KeyError(f"Unknown parameters: {sorted(unknown)}")
+    if parameters['output_format'] not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output_format: {parameters['output_format']}")
+    if parameters['x_bodypart'] is None or parameters['y_bodypart'] is None:
+        raise ValueError("Parameters 'x_bodypart' and 'y_bodypart' are required.")
+    return parameters
+
+
+def find_dlc_files(inputs, suffix='_freezy', exclude=()):
+    # Parameters
+    # inputs [str or list]: Paths of DLC files, directories (searched recursively) or glob patterns.
+    # suffix [str, Default='_freezy']: Files ending with this suffix are results of freezy and skipped.
+    # exclude [list, Default=()]: Other files written by a run (e.g. cohort table, manifest), skipped as well.
+
+    # Return
+    # paths [list]: Paths of supported DLC files, in input order without duplicates. Of files with the same name in
+    #               the same directory (e.g. 'mouse1.h5' and 'mouse1.csv') only the first extension in
+    #               DLC_EXTENSION_PREFERENCE is kept, as both would be written to the same result file.
+
+    if isinstance(inputs, str):
+        inputs = [inputs]
+    exclude = {os.path.abspath(path) for path in exclude if path is not None}
+
+    paths, seen = [], {}  # seen: path without extension -> index in paths
+    for entry in inputs:
+        if os.path.isdir(entry):
+            candidates = []
+            for root, dirs, files in os.walk(entry):
+                dirs.sort()
+                candidates += [os.path.join(root, file) for file in sorted(files)]
+        elif any(char in entry for char in '*?['):
+            candidates = sorted(glob.glob(entry, recursive=True))
+        else:
+            candidates = [entry]
+
+        for path in candidates:
+            # Skip unsupported files, the results of freezy ('<name>_freezy.csv', '<name>_freezy.speed.csv'), files
+            # being written ('<name>.<pid>.tmp.csv') and excluded files
+            base_name, extension = os.path.splitext(os.path.basename(path))
+            is_result = base_name.endswith(suffix) or base_name.rsplit('.', 1)[0].endswith(suffix)
+            if (extension not in SUPPORTED_EXTENSIONS or is_result or base_name.endswith('.tmp')
+                    or os.path.abspath(path) in exclude):
+                continue
+
+            # Keep the preferred extension of each name
+            name = os.path.splitext(os.path.abspath(path))[0]
+            if name not in seen:
+                seen[name] = len(paths)
+                paths.append(path)
+            elif (DLC_EXTENSION_PREFERENCE.index(extension) <
+                  DLC_EXTENSION_PREFERENCE.index(os.path.splitext(paths[seen[name]])[1])):
+                paths[seen[name]] = path
+    return paths
+
+
+def common_directory(paths):
+    # Deepest directory containing every path, e.g. for cohort-level files
+    return os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in paths])
+
+
+def result_path(path, parameters=None):
+    # Path of the result file next to the DLC file, e.g. 'mouse1_freezy.xlsx'
+    parameters = parameters or DEFAULT_PARAMETERS
+    extension, _ = OUTPUT_FORMATS[parameters['output_format']]
+    base_name = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(os.path.dirname(path), f"{base_name}{parameters['suffix']}{extension}")
+
+
+def compute_file_speed(path, parameters):
+    # Parameters
+    # path [str]: Path of DLC file.
+    # parameters [dict]: Result of 'make_parameters'.
+
+    # Return
+    # route [ndarr, (2, frames)]: Raw route.
+    # smoothed_route [ndarr, (2, frames)]: Smoothed route.
+    # speed [ndarr, 1D]: Speed per bin (cm/s).
+
+    x_bodypart, y_bodypart = parameters['x_bodypart'], parameters['y_bodypart']
+    _report_stage(path, 'read')
+    dlc_coordinates = extract_data(path, bodyparts=[x_bodypart, y_bodypart],
+                                   block_callback=_check_stop if _stop_event is not None else None)
+    coordinates_x, coordinates_y = extract_coordinates(dlc_coordinates, x_bodypart, y_bodypart)
+
+    route = make_route(coordinates_x, coordinates_y)
+    _report_stage(path, 'smooth')
+    smoothed_route = smooth_route(route, window_size=parameters['window_size'], order=parameters['order'])
+    _report_stage(path, 'speed')
+    speed = compute_speed(smoothed_route, fps=parameters['fps'], pixel_per_cm=parameters['pixel_per_cm'],
+                          bin_duration=parameters['bin_duration'])
+    return route, smoothed_route, speed
+
+
+def analyze_speed(path, parameters, route, smoothed_route, speed):
+    # Parameters
+    # path [str]: Path of DLC file.
+    # parameters [dict]: Result of 'make_parameters'.
+    # route, smoothed_route, speed: Result of 'compute_file_speed'.
+
+    # Return
+    # result [dict]: path, parameters, route, smoothed_route, speed, freezing_threshold, freeze_or_not,
+    #                freezing_ratio.
+
+    # Freezing threshold
+    freezing_threshold = parameters['freezing_threshold']
+    if freezing_threshold is None:
+        freezing_threshold = estimate_freezing_threshold_by_method(speed, parameters['freezing_threshold_method'])
+
+    # Freezing
+    freeze_or_not = detect_freezing(speed, freezing_threshold, min_duration=parameters['min_duration'],
+                                    max_gap=parameters['max_gap'], bin_duration=parameters['bin_duration'])
+    freezing_ratio = compute_freezing_ratio(freeze_or_not, parameters['protocol'],
+                                            bin_duration=parameters['bin_duration'])
+
+    return {
+        'path': path,
+        'parameters': parameters,
+        'route': route,
+        'smoothed_route': smoothed_route,
+        'speed': speed,
+        'freezing_threshold': freezing_threshold,
+        'freeze_or_not': freeze_or_not,
+        'freezing_ratio': freezing_ratio
+    }
+
+
+def analyze_file(path, parameters):
+    # Parameters
+    # path [str]: Path of DLC file.
+    # parameters [dict]: Result of 'make_parameters'.
+
+    # Return
+    # result [dict]: See 'analyze_speed'.
+
+    return analyze_speed(path, parameters, *compute_file_speed(path, parameters))
+
+
+def summarize_result(result):
+    # Parameter
+    # result [dict]: Result of 'analyze_file'.
+
+    # Return
+    # rows [list of dict]: One row per epoch of the protocol with its timing, freezing ratio, bouts and the
+    #                      parameters of the analysis.
+
+    parameters = result['parameters']
+    bin_duration = parameters['bin_duration']
+    protocols = np.atleast_2d(np.asarray(parameters['protocol'], dtype=float))
+    freezing_ratios = np.atleast_2d(result['freezing_ratio'])
+    setup = {name: parameters[name] for name in STAGE_PARAMETERS['speed'] + STAGE_PARAMETERS['freezing']
+             if name not in ('protocol', 'freezing_threshold')}
+
+    rows = []
+    for protocol_index, protocol in enumerate(protocols):
+        edges = np.concatenate(([0], np.cumsum(protocol)))
+        bouts = extract_freezing_bouts(result['freeze_or_not'], result['speed'], protocol, bin_duration)
+        summary = summarize_freezing_bouts(bouts, protocol)
+
+        for epoch in range(len(protocol)):
+            rows.append({
+                'file': os.path.basename(result['path']),
+                'path': result['path'],
+                'protocol': protocol_index,
+                'epoch': epoch,
+                'epoch_start': float(edges[epoch]),
+                'epoch_stop': float(edges[epoch + 1]),
+                'freezing_threshold': float(result['freezing_threshold']),
+                'freezing_ratio': float(freezing_ratios[protocol_index, epoch]),
+                'n_bouts': int(summary['n_bouts'][epoch]),
+                'freezing_time': float(summary['freezing_time'][epoch]),
+                'mean_bout_duration': float(summary['mean_duration'][epoch]),
+                'max_bout_duration': float(summary['max_duration'][epoch]),
+                **setup
+            })
+    return rows
+
+
+def cohort_table(results):
+    # Parameter
+    # results [list]: Results of 'run_batch'; failed files are left out.
+
+    # Return
+    # table [DataFrame]: One row per file x epoch (see 'summarize_result').
+
+    import pandas as pd
+
+    rows = [row for result in results if result['error'] is None for row in result['summary']]
+    return pd.DataFrame(rows)
+
+
+def cohort_path(paths, parameters=None):
+    # Path of the cohort table in the common directory of the files, e.g. 'cohort_freezy.parquet'. The suffix keeps
+    # it out of later directory scans.
+    suffix = (parameters or DEFAULT_PARAMETERS)['suffix']
+    return os.path.join(common_directory(paths), f"cohort{suffix}.parquet")
+
+
+def write_cohort_table(results, save_path):
+    # Parameters
+    # results [list]: Results of 'run_batch'.
+    # save_path [str]: Path of the cohort table, e.g. result of 'cohort_path'.
+
+    # Return
+    # save_path [str]: Path written; '.csv' instead of '.parquet' without a Parquet engine.
+
+    return write_table(cohort_table(results), save_path)
+
+
+def freezy_version():
+    # Installed version of freezy, 'unknown' when run from a source tree
+    try:
+        from importlib.metadata import version
+        return version('freezy')
+    except Exception:
+        return 'unknown'
+
+
+def hash_file(path, block_size=2 ** 20):
+    # SHA-1 of the file content
+    sha1 = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            sha1.update(block)
+    return sha1.hexdigest()
+
+
+def _hash(*values):
+    return hashlib.sha1(json.dumps(values, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def stage_keys(input_hash, parameters, version=None):
+    # Parameters
+    # input_hash [str]: Result of 'hash_file'.
+    # parameters [dict]: Result of 'make_parameters'.
+    # version [str, Default=None]: Version of freezy; None uses the installed one.
+
+    # Return
+    # keys [dict]: '<stage>_key' of every stage in STAGE_PARAMETERS. A key covers the input, the freezy version and
+    #              the parameters of its stage and all upstream stages.
+
+    keys = {}
+    upstream = (input_hash, version or freezy_version())
+    for stage, names in STAGE_PARAMETERS.items():
+        upstream = keys[f'{stage}_key'] = _hash(upstream, [parameters[name] for name in names])
+    return keys
+
+
+def load_manifest(path):
+    # Parameter
+    # path [str]: Path of manifest (JSON).
+
+    # Return
+    # manifest [dict]: {'manifest_version', 'freezy_version', 'files': {absolute input path: entry}}. Empty if the
+    #                  file does not exist or has another layout.
+
+    manifest = {'manifest_version': MANIFEST_VERSION, 'freezy_version': freezy_version(), 'files': {}}
+    if not os.path.exists(path):
+        return manifest
+
+    with open(path) as f:
+        stored = json.load(f)
+    if stored.get('manifest_version') == MANIFEST_VERSION:
+        manifest['files'] = stored['files']
+    return manifest
+
+
+def save_manifest(manifest, path):
+    # Parameters
+    # manifest [dict]: Result of 'load_manifest', updated by 'iter_batch'.
+    # path [str]: Path of manifest (JSON).
+
+    # Write atomically
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp_path, path)
+
+    # Drop speed stages no entry refers to anymore
+    stage_directory = _stage_directory(path)
+    if os.path.isdir(stage_directory):
+        referenced = {entry['speed_key'] + '.npz' for entry in manifest['files'].values()}
+        for file in os.listdir(stage_directory):
+            if file.endswith('.npz') and file not in referenced:
+                os.remove(os.path.join(stage_directory, file))
+
+
+def _stage_directory(manifest_path):
+    # Cached speed stages next to the manifest
+    return os.path.splitext(manifest_path)[0] + '_stages'
+
+
+def _input_record(path, entry, parameters):
+    # Content hash is reused from the manifest while size and mtime are unchanged
+    stat = os.stat(path)
+    if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+        input_hash = entry['input_hash']
+    else:
+        input_hash = hash_file(path)
+
+    record = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'input_hash': input_hash}
+    record.update(stage_keys(input_hash, parameters))
+    return record
+
+
+def _load_speed(path, parameters, record, stage_directory):
+    # Speed stage from the stage directory, or computed and stored there. Return (route, smoothed_route, speed,
+    # computed).
+    speed_path = os.path.join(stage_directory, record['speed_key'] + '.npz')
+    if os.path.exists(speed_path):
+        with np.load(speed_path) as stage:
+            return stage['route'], stage['smoothed_route'], stage['speed'], False
+
+    route, smoothed_route, speed = compute_file_speed(path, parameters)
+    tmp_path = f'{speed_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, route=route, smoothed_route=smoothed_route, speed=speed)
+    os.replace(tmp_path, speed_path)
+    return route, smoothed_route, speed, True
+
+
+def _error_result(path, parameters, error):
+    return {'path': path, 'parameters': parameters, 'error': error}
+
+
+def _init_worker(cache_directory, stage_queue=None, stop_event=None):
+    # Module state (cache, stage reports, stop requests) is per process
+    global _stage_queue, _stop_event
+    _stage_queue = stage_queue
+    _stop_event = stop_event
+    if cache_directory is not None:
+        set_cache(cache_directory)
+
+
+def _check_stop(*args):
+    # Stop the file between stages or blocks if the batch is stopped; also usable as 'block_callback'
+    if _stop_event is not None and _stop_event.is_set():
+        raise _Stopped()
+
+
+def _report_stage(path, stage):
+    # Tell the parent process which stage of a file a worker has started
+    _check_stop()
+    if _stage_queue is not None:
+        _stage_queue.put((path, stage))
+
+
+class _CallbackQueue:
+    # Stage reports of in-process runs go straight to the callback
+    def __init__(self, callback):
+        self.callback = callback
+
+    def put(self, item):
+        self.callback(*item)
+
+
+class _CallbackEvent:
+    # Stop requests of in-process runs are polled from the callback
+    def __init__(self, callback):
+        self.callback = callback
+
+    def is_set(self):
+        return bool(self.callback())
+
+
+def _drain(stage_queue, stage_callback):
+    while True:
+        try:
+            path, stage = stage_queue.get_nowait()
+        except queue.Empty:
+            return
+        stage_callback(path, stage)
+
+
+def _run_file(path, entry, parameters, keep_route, stage_directory):
+    # Full pipeline for one file; errors are captured, not raised
+    start = time.perf_counter()
+    try:
+        record = None
+        if stage_directory is None:
+            route, smoothed_route, speed = compute_file_speed(path, parameters)
+            stages = ['speed', 'freezing']
+        else:
+            record = _input_record(path, entry, parameters)
+
+            # Unchanged input and parameters: keep the previous output
+            if (entry and entry['output_key'] == record['output_key'] and 'summary' in entry
+                    and (not parameters['save'] or os.path.exists(entry['save_path']))):
+                result = {
+                    'path': path,
+                    'parameters': parameters,
+                    'freezing_threshold': entry['freezing_threshold'],
+                    'freezing_ratio': np.array(entry['freezing_ratio'], dtype=float),
+                    'save_path': entry['save_path'],
+                    'summary': entry['summary'],
+                    'stages': [],
+                    'error': None,
+                    'manifest_entry': {**entry, **record}
+                }
+                result['elapsed'] = time.perf_counter() - start
+                return result
+
+            route, smoothed_route, speed, computed = _load_speed(path, parameters, record, stage_directory)
+            stages = ['speed', 'freezing'] if computed else ['freezing']
+
+        _report_stage(path, 'freezing')
+        result = analyze_speed(path, parameters, route, smoothed_route, speed)
+        result['summary'] = summarize_result(result)
+        result['save_path'] = None
+        if parameters['save']:
+            _report_stage(path, 'output')
+            result['save_path'] = result_path(path, parameters)
+            write_result(result, result['save_path'], parameters['output_format'],
+                         frame_level=parameters['frame_level'])
+            stages.append('output')
+        if not keep_route:
+            del result['route'], result['smoothed_route']
+        result['stages'] = stages
+        result['error'] = None
+
+        if record is not None:
+            record.update({
+                'save_path': result['save_path'],
+                'freezing_threshold': float(result['freezing_threshold']),
+                'freezing_ratio': np.asarray(result['freezing_ratio'], dtype=float).tolist(),
+                'summary': result['summary']
+            })
+            result['manifest_entry'] = record
+    except _Stopped:
+        raise
+    except Exception:
+        result = _error_result(path, parameters, traceback.format_exc())
+    result['elapsed'] = time.perf_counter() - start
+    return result
+
+
+def _run_chunk(items, parameters, keep_route, stage_directory):
+    return [_run_file(path, entry, parameters, keep_route, stage_directory) for path, entry in items]
+
+
+def _speed_histogram_chunk(items, parameters, stage_directory):
+    # Pooled speed of a chunk; unreadable files are skipped here and reported by the analysis pass
+    speed_histogram = SpeedHistogram()
+    for path, entry in items:
+        try:
+            if stage_directory is None:
+                speed = compute_file_speed(path, parameters)[2]
+            else:
+                speed = _load_speed(path, parameters, _input_record(path, entry, parameters), stage_directory)[2]
+            speed_histogram.update(speed)
+        except _Stopped:
+            raise
+        except Exception:
+            pass
+    return speed_histogram
+
+
+def _iter_chunks(function, chunks, args, n_workers, mp_context, cache_directory, on_broken, stage_callback=None,
+                 should_stop=None):
+    # Yield (chunk index, chunk result) as completed, keeping at most 2 chunks per worker in flight
+    if n_workers == 1:
+        _init_worker(cache_directory, _CallbackQueue(stage_callback) if stage_callback is not None else None,
+                     _CallbackEvent(should_stop) if should_stop is not None else None)
+        try:
+            for i, chunk in enumerate(chunks):
+                try:
+                    chunk_result = function(chunk, *args)
+                except _Stopped:
+                    return
+                if should_stop is not None and should_stop():
+                    return
+                yield i, chunk_result
+        finally:
+            _init_worker(None)
+        return
+
+    if mp_context is None or isinstance(mp_context, str):
+        mp_context = multiprocessing.get_context(mp_context)
+    stage_queue = mp_context.Queue() if stage_callback is not None else None
+    stop_event = mp_context.Event() if should_stop is not None else None
+
+    def make_executor():
+        return ProcessPoolExecutor(max_workers=n_workers, mp_context=mp_context, initializer=_init_worker,
+                                   initargs=(cache_directory, stage_queue, stop_event))
+
+    executor = make_executor()
+    pending = {}
+    next_chunk = 0
+    try:
+        while next_chunk < len(chunks) or pending:
+            # Submit
+            while next_chunk < len(chunks) and len(pending) < 2 * n_workers:
+                try:
+                    future = executor.submit(function, chunks[next_chunk], *args)
+                except BrokenProcessPool:
+                    # A worker died (e.g. out of memory): chunks in flight fail with BrokenProcessPool below, the
+                    # rest run in a new pool
+                    executor.shutdown(wait=False)
+                    executor = make_executor()
+                    future = executor.submit(function, chunks[next_chunk], *args)
+                pending[future] = next_chunk
+                next_chunk += 1
+
+            # Collect; poll to forward stage reports and stop requests while files are running
+            polling = stage_callback is not None or should_stop is not None
+            done, _ = wait(pending, timeout=0.1 if polling else None, return_when=FIRST_COMPLETED)
+            if stage_queue is not None:
+                _drain(stage_queue, stage_callback)
+            if should_stop is not None and should_stop():
+                return
+
+            for future in done:
+                i = pending.pop(future)
+                try:
+                    yield i, future.result()
+                except BrokenProcessPool:
+                    yield i, on_broken(chunks[i])
+    finally:
+        # Stopped early (cancelled or closed generator): running files stop at their next stage or block, after
+        # any result file being written is complete
+        if stop_event is not None:
+            stop_event.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _broken_chunk(parameters):
+    def on_broken(items):
+        return [_error_result(path, parameters, "BrokenProcessPool: worker process terminated abruptly.")
+                for path, entry in items]
+    return on_broken
+
+
+def _make_chunks(paths, manifest, chunksize):
+    # Chunks of (path, manifest entry)
+    files = manifest['files'] if manifest is not None else {}
+    items = [(path, files.get(os.path.abspath(path))) for path in paths]
+    return [items[i:i + chunksize] for i in range(0, len(items), chunksize)]
+
+
+def estimate_pooled_threshold(paths, parameters, n_workers=None, chunksize=1, mp_context=None, manifest=None,
+                              stage_callback=None, should_stop=None):
+    # Parameters
+    # paths [list]: Paths of DLC files.
+    # parameters [dict]: Result of 'make_parameters'.
+    # n_workers [int, Default=None]: The number of worker processes; None uses all cores, 1 runs in this process.
+    # chunksize [int, Default=1]: The number of files per submitted task.
+    # mp_context [str or multiprocessing context, Default=None]: Start method of workers, e.g. 'spawn'.
+    # manifest [str, Default=None]: Path of manifest; speed stages are read from and stored next to it.
+    # stage_callback, should_stop: See 'iter_batch'.
+
+    # Return
+    # freezing_threshold [float]: Threshold of the pooled speed of all files (see 'SpeedHistogram').
+
+    stage_directory = None
+    manifest_data = None
+    if manifest is not None:
+        manifest_data = load_manifest(manifest)
+        stage_directory = _stage_directory(manifest)
+        os.makedirs(stage_directory, exist_ok=True)
+
+    chunks = _make_chunks(paths, manifest_data, chunksize)
+    n_workers = min(n_workers or os.cpu_count() or 1, max(len(chunks), 1))
+
+    speed_histogram = SpeedHistogram()
+    for _, chunk_histogram in _iter_chunks(_speed_histogram_chunk, chunks, (parameters, stage_directory), n_workers,
+                                           mp_context, parameters['cache_directory'], lambda chunk: SpeedHistogram(),
+                                           stage_callback=stage_callback, should_stop=should_stop):
+        speed_histogram.merge(chunk_histogram)
+    return speed_histogram.threshold(parameters['freezing_threshold_method'])
+
+
+def iter_batch(paths, parameters, n_workers=None, chunksize=1, ordered=True, keep_route=False,
+               progress_callback=None, mp_context=None, manifest=None, stage_callback=None, should_stop=None):
+    # Parameters
+    # paths [list]: Paths of DLC files.
+    # parameters [dict]: Result of 'make_parameters'.
+    # n_workers [int, Default=None]: The number of worker processes; None uses all cores, 1 runs in this process.
+    # chunksize [int, Default=1]: The number of files per submitted task. Larger chunks lower the overhead for
+    #                             many short files.
+    # ordered [bool, Default=True]: Yield results in the order of paths, or as they complete.
+    # keep_route [bool, Default=False]: Return the (smoothed) route of every file to this process.
+    # progress_callback [callable, Default=None]: Called as progress_callback(n_done, n_total, result) after every
+    #                                             file; returning False cancels the remaining files.
+    # mp_context [str or multiprocessing context, Default=None]: Start method of workers, e.g. 'spawn' from a GUI.
+    # manifest [str, Default=None]: Path of manifest (JSON) for incremental runs. Files whose content, parameters
+    #                               and freezy version are unchanged keep their previous output; only stale stages
+    #                               are recomputed, e.g. a new threshold reuses the stored speed.
+    # stage_callback [callable, Default=None]: Called as stage_callback(path, stage) when a worker starts a stage of
+    #                                          a file ('read', 'smooth', 'speed', 'freezing', 'output').
+    # should_stop [callable, Default=None]: Polled while files run; returning True stops the batch. Running files
+    #                                       stop at their next stage or block read; no result file is left
+    #                                       partially written.
+
+    # Yield
+    # result [dict]: Result of 'analyze_speed' with 'error' (None or traceback), 'elapsed' (s), 'save_path',
+    #                'summary' (rows of 'summarize_result') and 'stages' (recomputed stages; empty if skipped).
+    #                Skipped files have no route, speed or freeze_or_not.
+
+    paths = list(paths)
+    n_total = len(paths)
+    if n_total == 0:
+        return
+
+    # Cohort threshold first
+    if parameters['pooled_threshold'] and parameters['freezing_threshold'] is None:
+        parameters = {**parameters, 'freezing_threshold': estimate_pooled_threshold(
+            paths, parameters, n_workers=n_workers, chunksize=chunksize, mp_context=mp_context, manifest=manifest,
+            stage_callback=stage_callback, should_stop=should_stop
+        )}
+        if should_stop is not None and should_stop():
+            return
+
+    stage_directory = None
+    manifest_data = None
+    if manifest is not None:
+        manifest_data = load_manifest(manifest)
+        stage_directory = _stage_directory(manifest)
+        os.makedirs(stage_directory, exist_ok=True)
+
+    chunks = _make_chunks(paths, manifest_data, chunksize)
+    n_workers = min(n_workers or os.cpu_count() or 1, len(chunks))
+
+    n_done = 0
+    next_chunk = 0
+    finished = {}
+    try:
+        for i, chunk_results in _iter_chunks(_run_chunk, chunks, (parameters, keep_route, stage_directory),
+                                             n_workers, mp_context, parameters['cache_directory'],
+                                             _broken_chunk(parameters), stage_callback=stage_callback,
+                                             should_stop=should_stop):
+            if ordered:
+                finished[i] = chunk_results
+                chunk_results = []
+                while next_chunk in finished:
+                    chunk_results += finished.pop(next_chunk)
+                    next_chunk += 1
+
+            for result in chunk_results:
+                entry = result.pop('manifest_entry', None)
+                if entry is not None:
+                    manifest_data['files'][os.path.abspath(result['path'])] = entry
+
+                n_done += 1
+                yield result
+                if progress_callback is not None and progress_callback(n_done, n_total, result) is False:
+                    return
+    finally:
+        if manifest_data is not None:
+            save_manifest(manifest_data, manifest)
+
+
+def run_batch(paths, parameters, n_workers=None, chunksize=1, ordered=True, keep_route=False,
+              progress_callback=None, mp_context=None, manifest=None, stage_callback=None, should_stop=None):
+    # Parameters
+    # See 'iter_batch'.
+
+    # Return
+    # results [list]: Results of 'iter_batch'. Failed files have 'error' set instead of raising.
+
+    return list(iter_batch(paths, parameters, n_workers=n_workers, chunksize=chunksize, ordered=ordered,
+                           keep_route=keep_route, progress_callback=progress_callback, mp_context=mp_context,
+                           manifest=manifest, stage_callback=stage_callback, should_stop=should_stop))
@@ -1,52 +1,420 @@
 import os
+import re
+import csv
+import json
+import time
+import hashlib
 
 import numpy as np
-import pandas as pd
 
+# File extensions readable by 'extract_data'
+SUPPORTED_EXTENSIONS = ('.csv', '.xlsx', '.h5')
 
-def extract_data(path):
-    # Output
-    data = []
+# Header rows written by DeepLabCut above the coordinates
+_DLC_HEADER_ROWS = ('scorer', 'bodyparts', 'coords')
 
+# On-disk cache of parsed coordinates. Disabled until 'set_cache' is called.
+_cache = {'directory': None, 'max_bytes': 0}
+_cache_stats = {'hits': 0, 'misses': 0, 'cold_seconds': 0.0, 'warm_seconds': 0.0}
+
+# Files of cache entries ('<sha1 key>.npy', '<sha1 key>.json'); other files in the directory are never touched
+_CACHE_ENTRY = re.compile(r'[0-9a-f]{40}\.(npy|json)')
+
+
+def _parse_dlc_header(header_rows):
+    # Parameters
+    # header_rows [list of list]: Leading rows of the DLC table. The first cell of each row is the row name.
+    # Return
+    # columns [list of tuple]: (bodypart, coord) of each data column (index column excluded).
+    # n_header_rows [int]: The number of header rows in front of the coordinates.
+
+    # Collect header rows
+    header = {}
+    n_header_rows = 0
+    for row in header_rows:
+        if len(row) == 0 or str(row[0]) not in _DLC_HEADER_ROWS:
+            break
+        header[str(row[0])] = [str(cell) for cell in row[1:]]
+        n_header_rows += 1
+
+    # Check header
+    if 'bodyparts' not in header or 'coords' not in header:
+        raise ValueError("'bodyparts' and 'coords' rows are required in the DLC header.")
+
+    columns = list(zip(header['bodyparts'], header['coords']))
+
+    return columns, n_header_rows
+
+
+def read_dlc_header(path):
+    # Parameters
+    # path [str]: Path of DLC result (.csv).
+    # Return
+    # columns [list of tuple]: (bodypart, coord) of each data column (index column excluded).
+    # n_header_rows [int]: The number of header rows in front of the coordinates.
+
+    # Read header rows only
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        header_rows = [row for _, row in zip(range(len(_DLC_HEADER_ROWS)), reader)]
+
+    return _parse_dlc_header(header_rows)
+
+
+def _select_columns(columns, bodyparts=None, coords=('x', 'y')):
+    # Parameters
+    # columns [list of tuple]: (bodypart, coord) of each data column. Return of '_parse_dlc_header'.
+    # bodyparts [list or None, Default=None]: Bodyparts to select. None selects every bodypart.
+    # coords [list or None, Default=('x', 'y')]: Coords to select. None selects every coord (including likelihood).
+    # Return
+    # selected [list of tuple]: (column index, (bodypart, coord)) of the selected columns.
+
+    # Check bodyparts
+    if bodyparts is not None:
+        missing = set(bodyparts) - {bodypart for bodypart, _ in columns}
+        if missing:
+            raise KeyError(f"Unknown bodyparts: {sorted(missing)}")
+
+    # Select columns
+    selected = [(idx, (bodypart, coord)) for idx, (bodypart, coord) in enumerate(columns)
+                if (bodyparts is None or bodypart in bodyparts) and (coords is None or coord in coords)]
+
+    return selected
+
+
+def read_dlc_csv(path, bodyparts=None, coords=('x', 'y'), dtype=np.float64):
+    # Parameters
+    # path [str]: Path of DLC result (.csv).
+    # bodyparts [list or None, Default=None]: Bodyparts to read. None reads every bodypart.
+    # coords [list or None, Default=('x', 'y')]: Coords to read. None reads every coord (including likelihood).
+    # dtype [np.float32 or np.float64, Default=np.float64]: Data type of the coordinates.
+    # Return
+    # data [dict]: Coordinates [ndarr, 1D] keyed by (bodypart, coord).
+
+    import pandas as pd  # Imported on first read, not with freezy
+
+    # Read header
+    columns, n_header_rows = read_dlc_header(path)
+    selected = _select_columns(columns, bodyparts, coords)
+
+    # Parse the selected columns only; +1 to skip the index column
+    usecols = [idx + 1 for idx, _ in selected]
+    table = pd.read_csv(path, header=None, skiprows=n_header_rows, usecols=usecols, dtype=dtype, engine='c')
+
+    # Structure coordinates
+    data = {key: table[idx + 1].to_numpy(dtype=dtype, copy=True) for idx, key in selected}
+
+    return data
+
+
+def read_dlc_excel(path, bodyparts=None, coords=('x', 'y'), dtype=np.float64):
+    # Parameters
+    # path [str]: Path of DLC result (.xlsx).
+    # bodyparts [list or None, Default=None]: Bodyparts to read. None reads every bodypart.
+    # coords [list or None, Default=('x', 'y')]: Coords to read. None reads every coord (including likelihood).
+    # dtype [np.float32 or np.float64, Default=np.float64]: Data type of the coordinates.
+    # Return
+    # data [dict]: Coordinates [ndarr, 1D] keyed by (bodypart, coord).
+
+    import pandas as pd
+
+    # Read sheet
+    table = pd.read_excel(path, header=None)
+
+    # Read header
+    columns, n_header_rows = _parse_dlc_header(table.iloc[:len(_DLC_HEADER_ROWS)].values.tolist())
+    selected = _select_columns(columns, bodyparts, coords)
+
+    # Structure coordinates; +1 to skip the index column
+    data = {key: table.iloc[n_header_rows:, idx + 1].to_numpy(dtype=dtype) for idx, key in selected}
+
+    return data
+
+
+def _read_h5_layout(store, key):
+    # Find DLC table
+    if key is None:
+        key = store.keys()[0]
+    storer = store.get_storer(key)
+    n_frames = storer.nrows if storer.is_table else storer.group.axis1.shape[0]
+
+    # Read header from an empty selection
+    header = store.select(key, start=0, stop=0).columns
+    columns = list(zip(header.get_level_values('bodyparts'), header.get_level_values('coords')))
+
+    return key, n_frames, columns
+
+
+def read_dlc_h5(path, bodyparts=None, coords=('x', 'y'), dtype=np.float64, key=None, chunk_size=65536):
+    # Parameters
+    # path [str]: Path of DLC result (.h5).
+    # bodyparts [list or None, Default=None]: Bodyparts to read. None reads every bodypart.
+    # coords [list or None, Default=('x', 'y')]: Coords to read. None reads every coord (including likelihood).
+    # dtype [np.float32 or np.float64, Default=np.float64]: Data type of the coordinates.
+    # key [str or None, Default=None]: Key of the DLC table in the HDF5 file. None uses the first key.
+    # chunk_size [int, Default=65536]: The number of frames read from the file at once.
+    # Return
+    # data [dict]: Coordinates [ndarr, 1D] keyed by (bodypart, coord).
+
+    import pandas as pd
+
+    with pd.HDFStore(path, mode='r') as store:
+        # Find DLC table
+        key, n_frames, columns = _read_h5_layout(store, key)
+        selected = _select_columns(columns, bodyparts, coords)
+        indices = [idx for idx, _ in selected]
+
+        # Read frames chunk by chunk, keeping the selected columns only
+        values = np.empty((len(selected), n_frames), dtype=dtype)
+        for start in range(0, n_frames, chunk_size):
+            chunk = store.select(key, start=start, stop=start + chunk_size)
+            values[:, start:start + len(chunk)] = chunk.iloc[:, indices].to_numpy(dtype=dtype).T
+
+    # Structure coordinates
+    data = {column: values[i] for i, (_, column) in enumerate(selected)}
+
+    return data
+
+
+def _read_file(path, bodyparts, coords, dtype):
     # Get file extension
     _, extension = os.path.splitext(path)
+    if extension not in SUPPORTED_EXTENSIONS:
+        raise ValueError(f"Unsupported file extension: '{extension}'. Use one of {SUPPORTED_EXTENSIONS}.")
 
     # Extract file
     if extension == '.xlsx':
-        data = pd.read_excel(path, skiprows=1)
+        data = read_dlc_excel(path, bodyparts, coords, dtype)
     if extension == '.csv':
-        data = pd.read_csv(path, skiprows=1)  # skiprows=1; To skip debris row in the dlc results
+        data = read_dlc_csv(path, bodyparts, coords, dtype)
+    if extension == '.h5':
+        data = read_dlc_h5(path, bodyparts, coords, dtype)
+    return data
+
+
+def _read_blocks(path, bodyparts, coords, dtype, block_callback):
+    # '_read_file' assembled from 'iter_data' blocks, calling block_callback(n_frames) after each block
+    blocks = []
+    n_frames = 0
+    for block in iter_data(path, bodyparts, coords, dtype):
+        blocks.append(block)
+        n_frames += len(next(iter(block.values()), ()))
+        block_callback(n_frames)
+
+    if not blocks:
+        return _read_file(path, bodyparts, coords, dtype)
+    return {column: np.concatenate([block[column] for block in blocks]) for column in blocks[0]}
+
+
+def set_cache(directory, max_bytes=2 ** 30):
+    # Parameters
+    # directory [str or None]: Directory to store parsed coordinates. None disables the cache.
+    # max_bytes [int, Default=1 GiB]: Total size of the cache. The least recently used entries are evicted beyond it.
+
+    if directory is not None:
+        os.makedirs(directory, exist_ok=True)
+    _cache['directory'] = directory
+    _cache['max_bytes'] = max_bytes
+
+
+def clear_cache():
+    # Remove every cached entry and reset statistics
+    directory = _cache['directory']
+    if directory is not None:
+        for name in os.listdir(directory):
+            if _CACHE_ENTRY.fullmatch(name):
+                os.remove(os.path.join(directory, name))
+    _cache_stats.update(hits=0, misses=0, cold_seconds=0.0, warm_seconds=0.0)
+
+
+def cache_stats():
+    # Return
+    # stats [dict]: Cache hits and misses, and the total time [s] spent on cold (miss) and warm (hit) loads.
+    return dict(_cache_stats)
+
+
+def _cache_key(path, coords, dtype):
+    # Key by path, size and modification time; any change of the file invalidates the entry
+    stat = os.stat(path)
+    coords = tuple(coords) if coords is not None else None
+    identity = f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}|{coords}|{np.dtype(dtype).str}"
+    return hashlib.sha1(identity.encode()).hexdigest()
+
+
+def _evict_cache(keep):
+    # Evict the least recently used entries until the cache fits 'max_bytes'
+    directory = _cache['directory']
+    entries = []
+    for name in os.listdir(directory):
+        if _CACHE_ENTRY.fullmatch(name) and name.endswith('.npy'):
+            key = name[:-len('.npy')]
+            npy_path, json_path = os.path.join(directory, name), os.path.join(directory, key + '.json')
+            size = os.path.getsize(npy_path) + (os.path.getsize(json_path) if os.path.exists(json_path) else 0)
+            entries.append((os.path.getmtime(npy_path), key, size))
+
+    total_bytes = sum(size for _, _, size in entries)
+    for _, key, size in sorted(entries):
+        if total_bytes <= _cache['max_bytes']:
+            break
+        if key == keep:
+            continue
+        for extension in ('.npy', '.json'):
+            try:
+                os.remove(os.path.join(directory, key + extension))
+            except FileNotFoundError:
+                pass  # Evicted by another process
+        total_bytes -= size
+
+
+def _read_cached(path, bodyparts, coords, dtype, block_callback=None):
+    # Cache stores every bodypart of the file, so any later selection is served from it
+    directory = _cache['directory']
+    key = _cache_key(path, coords, dtype)
+    npy_path, json_path = os.path.join(directory, key + '.npy'), os.path.join(directory, key + '.json')
+
+    if os.path.exists(npy_path) and os.path.exists(json_path):
+        # Warm load: memory-map the cached coordinates
+        with open(json_path) as f:
+            columns = [tuple(column) for column in json.load(f)]
+        values = np.load(npy_path, mmap_mode='r')
+        os.utime(npy_path)  # Mark as recently used
+        hit = True
+    else:
+        # Cold load: parse the file and store every column
+        if block_callback is None:
+            full_data = _read_file(path, None, coords, dtype)
+        else:
+            full_data = _read_blocks(path, None, coords, dtype, block_callback)
+        columns = list(full_data)
+        values = np.array([full_data[column] for column in columns], dtype=dtype).reshape(len(columns), -1)
+
+        # Write atomically; concurrent readers never see a partial entry
+        tmp_suffix = f'.{os.getpid()}.tmp'
+        with open(npy_path + tmp_suffix, 'wb') as f:
+            np.save(f, values)
+        with open(json_path + tmp_suffix, 'w') as f:
+            json.dump(columns, f)
+        os.replace(json_path + tmp_suffix, json_path)
+        os.replace(npy_path + tmp_suffix, npy_path)
+        _evict_cache(keep=key)
+        hit = False
+
+    # Structure the selected coordinates
+    data = {column: values[idx] for idx, column in _select_columns(columns, bodyparts, None)}
+
+    return data, hit
+
+
+def extract_data(path, bodyparts=None, coords=('x', 'y'), dtype=np.float64, block_callback=None):
+    # Parameters
+    # path [str]: Path of DLC result (.csv, .xlsx or .h5).
+    # bodyparts [list or None, Default=None]: Bodyparts to read. None reads every bodypart.
+    # coords [list or None, Default=('x', 'y')]: Coords to read. None reads every coord (including likelihood).
+    # dtype [np.float32 or np.float64, Default=np.float64]: Data type of the coordinates.
+    # block_callback [callable, Default=None]: If given, a file not in the cache is parsed block by block
+    #                                          ('iter_data') and block_callback(n_frames) is called after each
+    #                                          block, e.g. to report progress or abort the read by raising.
+    # Return
+    # data [dict]: Coordinates [ndarr, 1D] keyed by (bodypart, coord).
+
+    # Read without cache
+    if _cache['directory'] is None:
+        if block_callback is None:
+            return _read_file(path, bodyparts, coords, dtype)
+        return _read_blocks(path, bodyparts, coords, dtype, block_callback)
+
+    # Read through cache
+    start_time = time.perf_counter()
+    data, hit = _read_cached(path, bodyparts, coords, dtype, block_callback)
+    elapsed = time.perf_counter() - start_time
+    if hit:
+        _cache_stats['hits'] += 1
+        _cache_stats['warm_seconds'] += elapsed
+    else:
+        _cache_stats['misses'] += 1
+        _cache_stats['cold_seconds'] += elapsed
     return data
 
 
+def iter_data(path, bodyparts=None, coords=('x', 'y'), dtype=np.float64, block_size=65536):
+    # Parameters
+    # path [str]: Path of DLC result (.csv, .xlsx or .h5).
+    # bodyparts [list or None, Default=None]: Bodyparts to read. None reads every bodypart.
+    # coords [list or None, Default=('x', 'y')]: Coords to read. None reads every coord (including likelihood).
+    # dtype [np.float32 or np.float64, Default=np.float64]: Data type of the coordinates.
+    # block_size [int, Default=65536]: The number of frames in each block.
+    # Yield
+    # data [dict]: Coordinates [ndarr, 1D, block_size or less] keyed by (bodypart, coord).
+
+    # Get file extension
+    _, extension = os.path.splitext(path)
+    if extension not in SUPPORTED_EXTENSIONS:
+        raise ValueError(f"Unsupported file extension: '{extension}'. Use one of {SUPPORTED_EXTENSIONS}.")
+
+    import pandas as pd
+
+    if extension == '.csv':
+        # Parse the selected columns block by block
+        columns, n_header_rows = read_dlc_header(path)
+        selected = _select_columns(columns, bodyparts, coords)
+        usecols = [idx + 1 for idx, _ in selected]
+        with pd.read_csv(path, header=None, skiprows=n_header_rows, usecols=usecols, dtype=dtype, engine='c',
+                         chunksize=block_size) as reader:
+            for table in reader:
+                yield {key: table[idx + 1].to_numpy(dtype=dtype, copy=True) for idx, key in selected}
+
+    if extension == '.h5':
+        # Read frames block by block
+        with pd.HDFStore(path, mode='r') as store:
+            key, n_frames, columns = _read_h5_layout(store, None)
+            selected = _select_columns(columns, bodyparts, coords)
+            indices = [idx for idx, _ in selected]
+            for start in range(0, n_frames, block_size):
+                values = store.select(key, start=start, stop=start + block_size).iloc[:, indices].to_numpy(dtype=dtype)
+                yield {column: values[:, i].copy() for i, (_, column) in enumerate(selected)}
+
+    if extension == '.xlsx':
+        # Excel cannot be read partially; split the loaded sheet
+        data = read_dlc_excel(path, bodyparts, coords, dtype)
+        n_frames = len(next(iter(data.values()))) if data else 0
+        for start in range(0, n_frames, block_size):
+            yield {key: values[start:start + block_size] for key, values in data.items()}
+
+
+def iter_route(path, x_bodypart, y_bodypart, dtype=np.float64, block_size=65536):
+    # Parameters
+    # path [str]: Path of DLC result (.csv, .xlsx or .h5).
+    # x_bodypart, y_bodypart [str]: Bodypart name to extract coordinates.
+    # dtype [np.float32 or np.float64, Default=np.float64]: Data type of the coordinates.
+    # block_size [int, Default=65536]: The number of frames in each block.
+    # Yield
+    # route [ndarr, 2D, (x, y)]: Route of movement for block_size frames or less.
+
+    for data in iter_data(path, [x_bodypart, y_bodypart], ('x', 'y'), dtype, block_size):
+        yield make_route(*extract_coordinates(data, x_bodypart, y_bodypart))
+
+
 def read_bodyparts(data):
     # Parameters
-    # data [DataFrame]: Return of 'extract_data'.
+    # data [dict]: Return of 'extract_data'.
     # Return
     # bodyparts [list]: Name of bodyparts in the data.
 
-    # Read data head
-    head = data.head()
-
-    # Read columns containing bodyparts
-    bodyparts = list(head.columns[1:])  # 'bodyparts' in index=0
+    # Read unique bodyparts keeping the column order
+    bodyparts = list(dict.fromkeys(bodypart for bodypart, _ in data))
 
     return bodyparts
 
 
 def extract_coordinates(data, x_bodypart, y_bodypart):
     # Parameters
-    # data [DataFrame]: Return of 'extract_data'.
+    # data [dict]: Return of 'extract_data'.
     # x_bodypart, y_bodypart [str]: Bodypart name to extract coordinates.
     # Return
-    # x_coordinates, y_coordinates [list]: Coordinates for each bodypart.
-
-    # Return
-    x_coordinates, y_coordinates = [], []
+    # x_coordinates, y_coordinates [ndarr, 1D]: Coordinates for each bodypart.
 
-    # Extract coordinates from each bodypart
-    x_coordinates, y_coordinates = (list(map(float, data[x_bodypart][1:])),
-                                    list(map(float, data[y_bodypart][1:])))
+    # Extract x coordinates of x_bodypart and y coordinates of y_bodypart
+    x_coordinates, y_coordinates = data[(x_bodypart, 'x')], data[(y_bodypart, 'y')]
 
     return x_coordinates, y_coordinates
 
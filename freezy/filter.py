@@ -1,5 +1,34 @@
 import numpy as np
 from math import factorial
+from functools import lru_cache
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+@lru_cache(maxsize=128)
+def _savitzky_golay_coefficients(window_size, order, deriv, rate):
+    order_range = range(order + 1)
+    half_window = (window_size - 1) // 2
+    b = np.array([[k ** i for i in order_range] for k in range(-half_window, half_window + 1)])
+    m = np.linalg.pinv(b)[deriv] * rate ** deriv * factorial(deriv)
+    m.setflags(write=False)  # Shared between calls
+    return m
+
+
+def savitzky_golay_coefficients(window_size, order, deriv=0, rate=1):
+    # Parameters
+    # window_size, order, deriv, rate: Same as 'savitzky_golay'.
+    # Return
+    # m [ndarr, 1D (window_size), read-only]: Filter coefficients. Memoized by (window_size, order, deriv, rate).
+
+    window_size = abs(int(window_size))
+    order = abs(int(order))
+
+    if window_size % 2 != 1 or window_size < 1:
+        raise TypeError("window_size size must be a positive odd number")
+    if window_size < order + 2:
+        raise TypeError("window_size is too small for the polynomials order")
+
+    return _savitzky_golay_coefficients(window_size, order, int(deriv), rate)
 
 
 def savitzky_golay(y, window_size, order, deriv=0, rate=1):
@@ -51,19 +80,9 @@ def savitzky_golay(y, window_size, order, deriv=0, rate=1):
        Cambridge University Press ISBN-13: 9780521880688
     """
 
-    window_size = np.abs(np.int64(window_size))
-    order = np.abs(np.int64(order))
-
-    if window_size % 2 != 1 or window_size < 1:
-        raise TypeError("window_size size must be a positive odd number")
-    if window_size < order + 2:
-        raise TypeError("window_size is too small for the polynomials order")
-    order_range = range(order + 1)
-    half_window = (window_size - 1) // 2
-
     # precompute coefficients
-    b = np.array([[k ** i for i in order_range] for k in range(-half_window, half_window + 1)])
-    m = np.linalg.pinv(b)[deriv] * rate ** deriv * factorial(deriv)
+    m = savitzky_golay_coefficients(window_size, order, deriv, rate)
+    half_window = (len(m) - 1) // 2
     # pad the signal at the extremes with
     # values taken from the signal itself
     firstvals = y[0] - np.abs(y[1:half_window + 1][::-1] - y[0])
@@ -72,19 +91,165 @@ def savitzky_golay(y, window_size, order, deriv=0, rate=1):
     return np.convolve(m[::-1], y, mode='valid')
 
 
-def smooth_route(route, window_size=15, order=4):
+def _as_float(y):
+    # Float arrays keep their dtype (e.g. float32 from 'extract_data'); others become float64
+    y = np.asarray(y)
+    return y if np.issubdtype(y.dtype, np.floating) else y.astype(float)
+
+
+def _correlate_valid(y, m, out):
+    # out[..., i] = sum_j m[j] * y[..., i + j]; windows are strided views of y, never copied
+    windows = sliding_window_view(y, len(m), axis=-1)
+    np.einsum('...iw,w->...i', windows, m, out=out, casting='same_kind')
+
+
+def batch_savitzky_golay(y, window_size, order, deriv=0, rate=1, axis=-1, out=None):
+    # Parameters
+    # y [ndarr, N-D]: Tracks to smooth. e.g. (tracks, frames).
+    # window_size, order, deriv, rate: Same as 'savitzky_golay'.
+    # axis [int, Default=-1]: Time axis.
+    # out [ndarr or None, Default=None]: Preallocated output with the shape of y. May be y itself.
+    # Return
+    # ys [ndarr, N-D]: The smoothed tracks (or their n-th derivative). Equal to 'savitzky_golay' on each track.
+
+    y = np.moveaxis(_as_float(y), axis, -1)
+    m = savitzky_golay_coefficients(window_size, order, deriv, rate).astype(y.dtype)
+    half_window = (len(m) - 1) // 2
+    n_frames = y.shape[-1]
+    if n_frames < half_window + 1:
+        raise ValueError("The signal is shorter than half of window_size")
+
+    # Output
+    if out is None:
+        out = np.empty(np.moveaxis(y, -1, axis).shape, dtype=y.dtype)
+    result = np.moveaxis(out, axis, -1)
+    target = np.empty(y.shape, dtype=result.dtype) if np.shares_memory(result, y) else result
+
+    # Values mirrored at the extremes; only the edges are padded, never the whole track
+    firstvals = y[..., :1] - np.abs(y[..., 1:half_window + 1][..., ::-1] - y[..., :1])
+    lastvals = y[..., -1:] + np.abs(y[..., -half_window - 1:-1][..., ::-1] - y[..., -1:])
+
+    if n_frames < window_size:
+        # Too short for an interior; filter the padded track
+        _correlate_valid(np.concatenate((firstvals, y, lastvals), axis=-1), m, target)
+    else:
+        _correlate_valid(np.concatenate((firstvals, y[..., :2 * half_window]), axis=-1), m,
+                         target[..., :half_window])
+        _correlate_valid(y, m, target[..., half_window:n_frames - half_window])
+        _correlate_valid(np.concatenate((y[..., n_frames - 2 * half_window:], lastvals), axis=-1), m,
+                         target[..., n_frames - half_window:])
+
+    if target is not result:
+        result[...] = target
+    return out
+
+
+def smooth_route(route, window_size=15, order=4, axes=None, out=None):
+    # Parameters
+    # route [ndarr, 2D (dims, frames) or N-D (..., dims, frames)]: Route of movement. e.g. (x, y) or
+    #                                                               (bodyparts, (x, y), frames).
+    # window_size [int, Default = 15]: Window size for savitzky golay filter.
+    # order [int, Default = 4]: Order for savitzky golay filter.
+    # axes [list or None, Default = None]: Coordinate axes to smooth. e.g. [1] smooths y only. None smooths every axis.
+    # out [ndarr or None, Default = None]: Preallocated output with the shape of route. May be route itself.
+    # Return
+    # smoothed_route [ndarr, same shape with route]: Smoothed route; float32 routes stay float32.
+
+    route = _as_float(route)
+
+    # Smoothing every axis in one call
+    if axes is None:
+        return batch_savitzky_golay(route, window_size, order, out=out)
+
+    # Smoothing selected axes; the others are kept
+    if out is None:
+        out = route.copy()
+    elif out is not route:
+        out[...] = route
+    out[..., axes, :] = batch_savitzky_golay(route[..., axes, :], window_size, order)
+
+    return out
+
+
+def iter_savitzky_golay(blocks, window_size, order, deriv=0, rate=1):
+    # Parameters
+    # blocks [iterable of ndarr, 1D (frames) or N-D (..., frames)]: Consecutive blocks of the signal (time on the
+    #                                                                last axis).
+    # window_size, order, deriv, rate: Same as 'savitzky_golay'.
+    # Yield
+    # ys [ndarr]: Consecutive blocks of the smoothed signal. Concatenated, equal to 'batch_savitzky_golay'.
+
+    # precompute coefficients
+    m = savitzky_golay_coefficients(window_size, order, deriv, rate)
+    half_window = (len(m) - 1) // 2
+
+    # Pending samples; carries window_size - 1 samples over block boundaries
+    y = None
+    padded = False
+    for block in blocks:
+        block = np.asarray(block, dtype=float)
+        y = block if y is None else np.concatenate((y, block), axis=-1)
+
+        # Pad the start once enough samples arrived
+        if not padded:
+            if y.shape[-1] < half_window + 1:
+                continue
+            firstvals = y[..., :1] - np.abs(y[..., 1:half_window + 1][..., ::-1] - y[..., :1])
+            y = np.concatenate((firstvals, y), axis=-1)
+            padded = True
+
+        # Emit every sample with a complete window
+        n_valid = y.shape[-1] - (len(m) - 1)
+        if n_valid > 0:
+            ys = np.empty(y.shape[:-1] + (n_valid,))
+            _correlate_valid(y, m, ys)
+            yield ys
+            y = y[..., n_valid:]
+
+    # Signal shorter than a half window; filter at once
+    if not padded:
+        if y is not None and y.shape[-1] > 0:
+            yield batch_savitzky_golay(y, window_size, order, deriv, rate)
+        return
+
+    # Pad the end
+    lastvals = y[..., -1:] + np.abs(y[..., -half_window - 1:-1][..., ::-1] - y[..., -1:])
+    y = np.concatenate((y, lastvals), axis=-1)
+    ys = np.empty(y.shape[:-1] + (y.shape[-1] - (len(m) - 1),))
+    _correlate_valid(y, m, ys)
+    yield ys
+
+
+def iter_smooth_route(route_blocks, window_size=15, order=4, axes=None):
     # Parameters
-    # route [ndarr, 2D, (x, y)]: Route of movement.
+    # route_blocks [iterable of ndarr, 2D (dims, frames) or N-D (..., dims, frames)]: Consecutive blocks of route.
+    #                                                                                 e.g. Return of 'iter_route'.
     # window_size [int, Default = 15]: Window size for savitzky golay filter.
     # order [int, Default = 4]: Order for savitzky golay filter.
+    # axes [list or None, Default = None]: Coordinate axes to smooth. None smooths every axis.
+    # Yield
+    # smoothed_route [ndarr]: Consecutive blocks of smoothed route. Concatenated, equal to 'smooth_route'.
 
-    # Define variables
-    route_x, route_y = route
+    # Smoothing every axis
+    if axes is None:
+        yield from iter_savitzky_golay(route_blocks, window_size, order)
+        return
 
-    # Smoothing y
-    route_y_hat = savitzky_golay(route_y, window_size, order)
+    # Raw route waiting for the delayed smoothed axes
+    pending = []
 
-    # Reorganize route
-    smoothed_route = np.stack((route_x, route_y_hat))
+    def selected_axes():
+        for route in route_blocks:
+            route = np.asarray(route, dtype=float)
+            pending.append(route)
+            yield route[..., axes, :]
 
-    return smoothed_route
+    # Smoothing selected axes
+    for route_hat in iter_savitzky_golay(selected_axes(), window_size, order):
+        # Reorganize route with as many raw frames as smoothed frames
+        route = np.concatenate(pending, axis=-1)
+        n_frames = route_hat.shape[-1]
+        pending[:] = [route[..., n_frames:]]
+        smoothed_route = route[..., :n_frames].copy()
+        smoothed_route[..., axes, :] = route_hat
+        yield smoothed_route
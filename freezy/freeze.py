@@ -6,17 +6,20 @@ def compute_speed_distribution(speed):
     # speed [ndarr, 1D]: Result of 'compute speed'.
     # Return
     # speed_distribution [ndarr, 1D]: Sorted speed. Highest to lowest speed.
+    # Note: Only needed to display the distribution; thresholds are estimated from speed directly.
 
     # Sort
-    speed_distribution = np.sort(speed, kind='mergesort')[::-1]  # Highest to lowest
+    speed_distribution = np.sort(speed)[::-1]  # Highest to lowest
 
     return speed_distribution
 
 
 def estimate_freezing_threshold(speed_distribution, detection_threshold=0.05):
     # Parameter
-    # speed_distribution [ndarr, 1D]: Return of compute_speed_distribution.
-    # detection_threshold [float, 0 <= detection_threshold <= 1]: Detection threshold to find freezing threshold from the top.
+    # speed_distribution [ndarr, 1D]: Result of 'compute_speed' (or 'compute_speed_distribution'; sorting is not
+    #                                 required).
+    # detection_threshold [float, 0 <= detection_threshold <= 1]: Detection threshold to find freezing threshold
+    #                                                             from the top.
     # Return
     # freezing_threshold [float]: Estimated freezing threshold.
 
@@ -32,40 +35,522 @@ def estimate_freezing_threshold(speed_distribution, detection_threshold=0.05):
     return freezing_threshold
 
 
-def detect_freezing(speed, freezing_threshold):
+def estimate_freezing_threshold_quantile(speed, quantile=0.05):
+    # Parameter
+    # speed [ndarr, 1D]: Result of 'compute_speed'. Need not be sorted.
+    # quantile [float, 0 <= quantile <= 1]: Fraction of bins at or below the freezing threshold.
+    # Return
+    # freezing_threshold [float]: Estimated freezing threshold. Equal to np.quantile(speed, quantile).
+
+    # Ignore bins without speed
+    speed = np.asarray(speed, dtype=float)
+    speed = speed[~np.isnan(speed)]
+    if len(speed) == 0:
+        return np.nan
+
+    # Select the two neighbouring order statistics in linear time, then interpolate
+    position = quantile * (len(speed) - 1)
+    lower = int(np.floor(position))
+    upper = min(lower + 1, len(speed) - 1)
+    partitioned = np.partition(speed, [lower, upper])
+    freezing_threshold = partitioned[lower] + (position - lower) * (partitioned[upper] - partitioned[lower])
+
+    return float(freezing_threshold)
+
+
+# Speed histograms are built on log10(speed + offset); zero speed stays finite and single tracking spikes are compressed
+_LOG_SPEED_OFFSET = 0.01
+
+
+def _log_speed_histogram(speed, bins):
+    # Histogram of log speed; O(n). With explicit edges, values outside are clipped into the outer bins.
+    speed = np.asarray(speed, dtype=float)
+    log_speed = np.log10(speed[np.isfinite(speed)] + _LOG_SPEED_OFFSET)
+    if np.ndim(bins) > 0:
+        log_speed = np.clip(log_speed, bins[0], bins[-1])
+    counts, edges = np.histogram(log_speed, bins=bins)
+    return counts, edges
+
+
+def _threshold_otsu(counts, edges):
+    # Edge maximizing the between-class variance of the histogram
+    centers = (edges[:-1] + edges[1:]) / 2
+    weight_low = np.cumsum(counts)[:-1]
+    weight_high = weight_low[-1] + counts[-1] - weight_low if len(weight_low) else weight_low
+    moment_low = np.cumsum(counts * centers)[:-1]
+    mean_total = np.sum(counts * centers) / max(np.sum(counts), 1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        between_variance = (mean_total * weight_low - moment_low) ** 2 / (weight_low * weight_high)
+    between_variance[~np.isfinite(between_variance)] = -1
+    if len(between_variance) == 0 or between_variance.max() < 0:
+        return centers[np.flatnonzero(counts)[-1]] if np.any(counts) else np.nan  # Nothing to split
+    return edges[np.argmax(between_variance) + 1]
+
+
+def _threshold_gmm(counts, edges, n_iter=200, tol=1e-8):
+    # Two-component Gaussian mixture fitted by EM on the histogram; threshold where the components are equally likely
+    centers = (edges[:-1] + edges[1:]) / 2
+    weights = counts / max(np.sum(counts), 1)
+    min_variance = (edges[1] - edges[0]) ** 2 / 12
+
+    # Initialize from the Otsu split
+    split = centers < _threshold_otsu(counts, edges)
+    if weights[split].sum() == 0 or weights[~split].sum() == 0:
+        return _threshold_otsu(counts, edges)
+    responsibility = np.stack((split, ~split)).astype(float)
+
+    previous_likelihood = -np.inf
+    for _ in range(n_iter):
+        # M-step
+        component_weight = np.sum(weights * responsibility, axis=1)
+        mean = np.sum(weights * responsibility * centers, axis=1) / component_weight
+        variance = np.sum(weights * responsibility * (centers - mean[:, None]) ** 2, axis=1) / component_weight
+        variance = np.maximum(variance, min_variance)
+
+        # E-step
+        log_density = (np.log(component_weight)[:, None] - 0.5 * np.log(2 * np.pi * variance)[:, None]
+                       - (centers - mean[:, None]) ** 2 / (2 * variance[:, None]))
+        log_total = np.logaddexp(log_density[0], log_density[1])
+        responsibility = np.exp(log_density - log_total)
+        likelihood = np.sum(weights * log_total)
+        if likelihood - previous_likelihood < tol:
+            break
+        previous_likelihood = likelihood
+
+    # Crossing of the components between their means
+    low, high = np.argsort(mean)
+    difference = log_density[low] - log_density[high]
+    between = np.flatnonzero((centers >= mean[low]) & (centers <= mean[high]) & (difference <= 0))
+    if len(between) == 0:
+        return (mean[low] + mean[high]) / 2
+    idx = between[0]
+    if idx == 0 or difference[idx - 1] <= 0:
+        return centers[idx]
+    fraction = difference[idx - 1] / (difference[idx - 1] - difference[idx])
+    return centers[idx - 1] + fraction * (centers[idx] - centers[idx - 1])
+
+
+def _threshold_kde_valley(counts, edges, bandwidth=None):
+    # Deepest valley between the two highest peaks of a Gaussian kernel density estimate on the histogram grid
+    centers = (edges[:-1] + edges[1:]) / 2
+    bin_width = edges[1] - edges[0]
+    n_samples = np.sum(counts)
+    if n_samples < 2:
+        return _threshold_otsu(counts, edges)
+
+    # Silverman's rule of thumb
+    if bandwidth is None:
+        mean = np.sum(counts * centers) / n_samples
+        std = np.sqrt(np.sum(counts * (centers - mean) ** 2) / n_samples)
+        bandwidth = 1.06 * max(std, bin_width) * n_samples ** (-1 / 5)
+
+    # Binned KDE: histogram convolved with a Gaussian kernel. The kernel can be longer than the histogram for short
+    # recordings (wide bandwidth); 'same' would then return the length of the kernel, so the centered part of the
+    # full convolution is taken.
+    half_width = int(np.ceil(4 * bandwidth / bin_width))
+    offsets = np.arange(-half_width, half_width + 1) * bin_width
+    kernel = np.exp(-0.5 * (offsets / bandwidth) ** 2)
+    density = np.convolve(counts, kernel / kernel.sum(), mode='full')[half_width:half_width + len(counts)]
+
+    # Two highest local maxima
+    padded = np.concatenate(([-np.inf], density, [-np.inf]))
+    peaks = np.flatnonzero((density > padded[:-2]) & (density >= padded[2:]))
+    if len(peaks) < 2:
+        return _threshold_otsu(counts, edges)
+    low, high = np.sort(peaks[np.argsort(density[peaks])[-2:]])
+
+    return centers[low + np.argmin(density[low:high + 1])]
+
+
+def _log_speed_to_speed(log_speed):
+    return max(10 ** log_speed - _LOG_SPEED_OFFSET, 0.0)
+
+
+def estimate_freezing_threshold_otsu(speed, bins=256):
     # Parameter
     # speed [ndarr, 1D]: Result of 'compute_speed'.
-    # freezing_threshold [int or float]: A threshold to detect as freeze.
+    # bins [int or ndarr, Default=256]: The number of histogram bins over log10 speed, or their edges.
+    # Return
+    # freezing_threshold [float]: Threshold maximizing the between-class variance of log speed (Otsu's method).
+
+    counts, edges = _log_speed_histogram(speed, bins)
+    return _log_speed_to_speed(_threshold_otsu(counts, edges))
+
+
+def estimate_freezing_threshold_gmm(speed, bins=256):
+    # Parameter
+    # speed [ndarr, 1D]: Result of 'compute_speed'.
+    # bins [int or ndarr, Default=256]: The number of histogram bins over log10 speed, or their edges.
+    # Return
+    # freezing_threshold [float]: Threshold where the freezing and moving components of a two-component Gaussian
+    #                             mixture on log speed are equally likely.
+
+    counts, edges = _log_speed_histogram(speed, bins)
+    return _log_speed_to_speed(_threshold_gmm(counts, edges))
+
+
+def estimate_freezing_threshold_kde(speed, bins=256, bandwidth=None):
+    # Parameter
+    # speed [ndarr, 1D]: Result of 'compute_speed'.
+    # bins [int or ndarr, Default=256]: The number of histogram bins over log10 speed, or their edges.
+    # bandwidth [float or None, Default=None]: Kernel bandwidth in log10 speed. None uses Silverman's rule.
+    # Return
+    # freezing_threshold [float]: Threshold at the deepest valley between the two main modes of the log speed
+    #                             density. Falls back to Otsu's method on a unimodal density.
+
+    counts, edges = _log_speed_histogram(speed, bins)
+    return _log_speed_to_speed(_threshold_kde_valley(counts, edges, bandwidth))
+
+
+# Freezing threshold estimators selectable by name: (function, default keyword arguments)
+FREEZING_THRESHOLD_METHODS = {
+    'auto': (estimate_freezing_threshold, {'detection_threshold': 0.01}),
+    'superior_1': (estimate_freezing_threshold, {'detection_threshold': 0.01}),
+    'superior_5': (estimate_freezing_threshold, {'detection_threshold': 0.05}),
+    'superior_10': (estimate_freezing_threshold, {'detection_threshold': 0.1}),
+    'quantile_5': (estimate_freezing_threshold_quantile, {'quantile': 0.05}),
+    'quantile_10': (estimate_freezing_threshold_quantile, {'quantile': 0.1}),
+    'quantile_25': (estimate_freezing_threshold_quantile, {'quantile': 0.25}),
+    'otsu': (estimate_freezing_threshold_otsu, {}),
+    'gmm': (estimate_freezing_threshold_gmm, {}),
+    'kde': (estimate_freezing_threshold_kde, {}),
+}
+
+
+def estimate_freezing_threshold_by_method(speed, method='auto', **kwargs):
+    # Parameter
+    # speed [ndarr, 1D]: Result of 'compute_speed'.
+    # method [str, Default='auto']: Name in FREEZING_THRESHOLD_METHODS.
+    # kwargs: Overrides of the default keyword arguments of the method.
     # Return
-    # freeze_or_not [ndarr, 1D (Same length with speed)]: Freezing or not. 0: Not freezing; 1: Freezing.
+    # freezing_threshold [float]: Estimated freezing threshold.
+
+    if method not in FREEZING_THRESHOLD_METHODS:
+        raise ValueError(f"Unknown freezing_threshold_method: {method}")
+
+    function, default_kwargs = FREEZING_THRESHOLD_METHODS[method]
+    return function(speed, **{**default_kwargs, **kwargs})
+
+
+class SpeedHistogram:
+    # Streaming, mergeable histogram of log10 speed to estimate one freezing threshold for a whole cohort without
+    # holding every speed in memory. Bins are fixed by (max_speed, n_bins), so histograms fed in different processes
+    # add up exactly with 'merge'.
+    # Error bound: 'threshold' equals the estimator run on the pooled speed with 'bins=histogram.edges' (range
+    # methods are exact); compared with any other binning, and for 'quantile', the threshold is within one bin in
+    # log10(speed + 0.01 cm/s), i.e. speed + 0.01 has a relative error below 10 ** bin_width - 1 (0.28% with the
+    # defaults). Speed above max_speed is counted in the last bin.
+
+    def __init__(self, max_speed=1000, n_bins=4096):
+        # Parameter
+        # max_speed [int or float, Default=1000 cm/s]: Upper edge of the histogram.
+        # n_bins [int, Default=4096]: The number of bins over log10 speed.
+
+        self.edges = np.linspace(np.log10(_LOG_SPEED_OFFSET), np.log10(max_speed + _LOG_SPEED_OFFSET), n_bins + 1)
+        self.counts = np.zeros(n_bins, dtype=np.int64)
+        self.min_speed = np.inf
+        self.max_speed = -np.inf
+
+    @property
+    def n_samples(self):
+        return int(np.sum(self.counts))
+
+    def update(self, speed):
+        # Parameter
+        # speed [ndarr, 1D]: Result of 'compute_speed' of one file.
+
+        speed = np.asarray(speed, dtype=float)
+        speed = speed[np.isfinite(speed)]
+        if len(speed) == 0:
+            return self
+
+        counts, _ = _log_speed_histogram(speed, self.edges)
+        self.counts += counts
+        self.min_speed = min(self.min_speed, float(np.min(speed)))
+        self.max_speed = max(self.max_speed, float(np.max(speed)))
+        return self
+
+    def merge(self, other):
+        # Parameter
+        # other [SpeedHistogram]: Histogram with the same bins, e.g. from a worker process.
+
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError("Cannot merge SpeedHistograms with different bins.")
+
+        self.counts += other.counts
+        self.min_speed = min(self.min_speed, other.min_speed)
+        self.max_speed = max(self.max_speed, other.max_speed)
+        return self
+
+    def quantile(self, quantile=0.05):
+        # Parameter
+        # quantile [float, 0 <= quantile <= 1]: Fraction of pooled bins at or below the freezing threshold.
+        # Return
+        # freezing_threshold [float]: Pooled speed quantile, interpolated within its histogram bin.
+
+        n_samples = self.n_samples
+        if n_samples == 0:
+            return np.nan
 
-    # Make freeze_or_not array
-    freeze_or_not = np.zeros((len(speed),))
+        # Histogram bin of the target rank, then linear position inside it
+        rank = quantile * (n_samples - 1) + 1
+        cumulative_counts = np.cumsum(self.counts)
+        idx = min(int(np.searchsorted(cumulative_counts, rank)), len(self.counts) - 1)
+        previous_count = cumulative_counts[idx - 1] if idx > 0 else 0
+        fraction = (rank - previous_count) / self.counts[idx] if self.counts[idx] else 0
+        log_speed = self.edges[idx] + fraction * (self.edges[idx + 1] - self.edges[idx])
+
+        return float(np.clip(_log_speed_to_speed(log_speed), self.min_speed, self.max_speed))
+
+    def threshold(self, method='auto', **kwargs):
+        # Parameter
+        # method [str, Default='auto']: Name in FREEZING_THRESHOLD_METHODS.
+        # kwargs: Overrides of the default keyword arguments of the method.
+        # Return
+        # freezing_threshold [float]: Freezing threshold of the pooled speed.
+
+        if method not in FREEZING_THRESHOLD_METHODS:
+            raise ValueError(f"Unknown freezing_threshold_method: {method}")
+        if self.n_samples == 0:
+            return np.nan
+
+        function, default_kwargs = FREEZING_THRESHOLD_METHODS[method]
+        kwargs = {**default_kwargs, **kwargs}
+        kwargs.pop('bins', None)
+
+        # Range-based threshold needs the extremes only
+        if function is estimate_freezing_threshold:
+            return estimate_freezing_threshold(np.array([self.min_speed, self.max_speed]), **kwargs)
+        if function is estimate_freezing_threshold_quantile:
+            return self.quantile(kwargs['quantile'])
+
+        # Histogram-based thresholds
+        histogram_thresholds = {estimate_freezing_threshold_otsu: _threshold_otsu,
+                                estimate_freezing_threshold_gmm: _threshold_gmm,
+                                estimate_freezing_threshold_kde: _threshold_kde_valley}
+        return _log_speed_to_speed(histogram_thresholds[function](self.counts, self.edges, **kwargs))
+
+
+def _find_bouts(freeze_or_not, breaks=None):
+    # Run-length encoding of the nonzero runs; stops are exclusive. Runs are also split at 'breaks' (bin indices).
+    mask = np.asarray(freeze_or_not) != 0
+    n_bins = len(mask)
+
+    boundary = np.zeros(n_bins + 1, dtype=bool)
+    boundary[[0, n_bins]] = True
+    if breaks is not None:
+        breaks = np.asarray(breaks, dtype=np.int64)
+        boundary[breaks[(breaks >= 0) & (breaks <= n_bins)]] = True
+
+    previous = np.concatenate(([False], mask[:-1]))
+    following = np.concatenate((mask[1:], [False]))
+    starts = np.flatnonzero(mask & (~previous | boundary[:-1]))
+    stops = np.flatnonzero(mask & (~following | boundary[1:])) + 1
+    return starts, stops
+
+
+def _protocol_edges(protocol, bin_duration=1):
+    # Bin index where each session of the protocol starts, and where the last one ends
+    seconds = np.concatenate(([0], np.cumsum(protocol, dtype=float)))
+    return np.round(seconds / bin_duration).astype(np.int64)
+
+
+def _fill_runs(mask, starts, stops, value):
+    # Set mask[start:stop] = value for every run at once
+    delta = np.zeros(len(mask) + 1, dtype=np.int64)
+    np.add.at(delta, starts, 1)
+    np.add.at(delta, stops, -1)
+    mask[np.cumsum(delta[:-1]) > 0] = value
+    return mask
+
+
+def detect_freezing(speed, freezing_threshold, min_duration=0, max_gap=0, bin_duration=1):
+    # Parameter
+    # speed [ndarr, 1D]: Result of 'compute_speed'.
+    # freezing_threshold [int or float]: A threshold to detect as freeze.
+    # min_duration [int or float, Default=0 s]: Minimum duration of a freezing bout. Shorter bouts are not freezing.
+    # max_gap [int or float, Default=0 s]: Gaps between freezing bouts as long as max_gap or shorter are merged into
+    #                                      freezing before 'min_duration' is applied.
+    # bin_duration [int or float, Default=1 s]: Duration of a speed bin used in 'compute_speed'.
+    # Return
+    # freeze_or_not [ndarr, 1D, uint8 (Same length with speed)]: Freezing or not. 0: Not freezing; 1: Freezing.
 
     # Detect freezing
-    for idx, spd in enumerate(speed):
-        if spd <= freezing_threshold:
-            freeze_or_not[idx] = 1
-    return freeze_or_not
+    freeze_or_not = np.asarray(speed) <= freezing_threshold
+
+    # Merge freezing bouts separated by short gaps
+    if max_gap > 0:
+        starts, stops = _find_bouts(freeze_or_not)
+        gap_starts, gap_stops = stops[:-1], starts[1:]
+        short_gap = (gap_stops - gap_starts) * bin_duration <= max_gap
+        freeze_or_not = _fill_runs(freeze_or_not, gap_starts[short_gap], gap_stops[short_gap], True)
+
+    # Remove freezing bouts shorter than the minimum duration
+    if min_duration > 0:
+        starts, stops = _find_bouts(freeze_or_not)
+        short_bout = (stops - starts) * bin_duration < min_duration
+        freeze_or_not = _fill_runs(freeze_or_not, starts[short_bout], stops[short_bout], False)
+
+    return freeze_or_not.astype(np.uint8)
+
 
+# Fields of 'extract_freezing_bouts'
+BOUT_DTYPE = np.dtype([('epoch', np.int64), ('start', np.float64), ('stop', np.float64),
+                       ('duration', np.float64), ('mean_speed', np.float64)])
 
-def compute_freezing_ratio(freeze_or_not, protocol):
+# Fields of 'summarize_freezing_bouts'
+EPOCH_BOUT_DTYPE = np.dtype([('n_bouts', np.int64), ('freezing_time', np.float64),
+                             ('mean_duration', np.float64), ('max_duration', np.float64)])
+
+
+def extract_freezing_bouts(freeze_or_not, speed=None, protocol=None, bin_duration=1):
     # Parameter
     # freeze_or_not [ndarr, 1D]: Result of 'detect_freezing'.
+    # speed [ndarr, 1D or None, Default=None]: Result of 'compute_speed'. None leaves 'mean_speed' as nan.
+    # protocol [list or ndarr, 1D, in second, or None, Default=None]: Duration of each session in the protocol.
+    #                                                                 Bouts are split at the session boundaries.
+    # bin_duration [int or float, Default=1 s]: Duration of a speed bin used in 'compute_speed'.
+    # Return
+    # bouts [structured ndarr, 1D, BOUT_DTYPE]: One row per freezing bout. 'epoch' is the index of the session in the
+    #                                           protocol (-1 beyond the protocol or without protocol); 'start',
+    #                                           'stop' and 'duration' are in second; 'mean_speed' in cm/s.
+    #                                           Use 'pd.DataFrame(bouts)' for a table.
+
+    # Find bouts
+    edges = None if protocol is None else _protocol_edges(protocol, bin_duration)
+    starts, stops = _find_bouts(freeze_or_not, breaks=edges)
+
+    # Structure bouts
+    bouts = np.empty(len(starts), dtype=BOUT_DTYPE)
+    bouts['start'] = starts * bin_duration
+    bouts['stop'] = stops * bin_duration
+    bouts['duration'] = (stops - starts) * bin_duration
+
+    # Session of each bout
+    if edges is None:
+        bouts['epoch'] = -1
+    else:
+        epoch = np.searchsorted(edges, starts, side='right') - 1
+        epoch[starts >= edges[-1]] = -1
+        bouts['epoch'] = epoch
+
+    # Mean speed within bouts from the cumulative sum of speed
+    if speed is None:
+        bouts['mean_speed'] = np.nan
+    else:
+        cumulative_speed = np.concatenate(([0], np.cumsum(speed, dtype=float)))
+        bouts['mean_speed'] = (cumulative_speed[stops] - cumulative_speed[starts]) / (stops - starts)
+
+    return bouts
+
+
+def summarize_freezing_bouts(bouts, protocol):
+    # Parameter
+    # bouts [structured ndarr, 1D, BOUT_DTYPE]: Result of 'extract_freezing_bouts' with the same protocol.
     # protocol [list or ndarr, 1D, in second]: Duration of each session in the protocol.
     # Return
-    # freezing_ratio [ndarr, 1D (Same length with protocol)]: The ratio of freezing during the sessions.
+    # summary [structured ndarr, 1D, EPOCH_BOUT_DTYPE (Same length with protocol)]: The number of bouts, total
+    #                                                                               freezing time [s], mean and
+    #                                                                               maximum bout duration [s] of each
+    #                                                                               session.
+
+    n_epochs = len(protocol)
+    bouts = bouts[(bouts['epoch'] >= 0) & (bouts['epoch'] < n_epochs)]
+    epoch, duration = bouts['epoch'], bouts['duration']
+
+    # Aggregate per session
+    summary = np.zeros(n_epochs, dtype=EPOCH_BOUT_DTYPE)
+    summary['n_bouts'] = np.bincount(epoch, minlength=n_epochs)
+    summary['freezing_time'] = np.bincount(epoch, weights=duration, minlength=n_epochs)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        summary['mean_duration'] = summary['freezing_time'] / summary['n_bouts']
+    np.maximum.at(summary['max_duration'], epoch, duration)
+
+    return summary
+
+
+def compute_epoch_freezing_ratio(freeze_or_not, epochs, bin_duration=1):
+    # Parameter
+    # freeze_or_not [ndarr, 1D]: Result of 'detect_freezing'.
+    # epochs [list or ndarr, (..., 2), in second]: (start, stop) of each epoch. Any leading shape, e.g. (epochs, 2)
+    #                                              or (protocols, epochs, 2). Epochs may overlap.
+    # bin_duration [int or float, Default=1 s]: Duration of a speed bin used in 'compute_speed'.
+    # Return
+    # freezing_ratio [ndarr, epochs.shape[:-1]]: The ratio of freezing during the recorded part of each epoch.
+    #                                            nan if no part of the epoch was recorded.
+    # truncated [ndarr, bool, epochs.shape[:-1]]: Whether the epoch reaches outside of the recording.
+
+    # Prefix sum of freezing; any epoch is then a difference of two entries
+    n_bins = len(freeze_or_not)
+    cumulative_freezing = np.concatenate(([0], np.cumsum(freeze_or_not, dtype=np.float64)))
 
-    # Variables
-    previous_ptc = 0
+    # Epochs in bins, clipped to the recording
+    epoch_bins = np.round(np.asarray(epochs, dtype=float) / bin_duration).astype(np.int64)
+    start_bin = np.clip(epoch_bins[..., 0], 0, n_bins)
+    stop_bin = np.clip(epoch_bins[..., 1], start_bin, n_bins)
+    truncated = (epoch_bins[..., 0] < 0) | (epoch_bins[..., 1] > n_bins)
 
-    # Declare output
-    freezing_ratio = []
+    # Compute freezing ratio over the covered duration
+    freezing_bins = cumulative_freezing[stop_bin] - cumulative_freezing[start_bin]
+    covered_bins = stop_bin - start_bin
+    with np.errstate(invalid='ignore', divide='ignore'):
+        freezing_ratio = np.where(covered_bins > 0, 100 * freezing_bins / covered_bins, np.nan)
+
+    return freezing_ratio, truncated
+
+
+def compute_freezing_ratio(freeze_or_not, protocol, bin_duration=1):
+    # Parameter
+    # freeze_or_not [ndarr, 1D]: Result of 'detect_freezing'.
+    # protocol [list or ndarr, 1D or 2D (protocols, sessions), in second]: Duration of each session in the protocol.
+    # bin_duration [int or float, Default=1 s]: Duration of a speed bin used in 'compute_speed'.
+    # Return
+    # freezing_ratio [ndarr, (Same shape with protocol)]: The ratio of freezing during the sessions. Sessions cut by
+    #                                                     the end of recording are normalized by their recorded
+    #                                                     duration; nan if not recorded at all.
+
+    # Sessions as (start, stop)
+    protocol = np.asarray(protocol, dtype=float)
+    edges = np.concatenate((np.zeros(protocol.shape[:-1] + (1,)), np.cumsum(protocol, axis=-1)), axis=-1)
+    epochs = np.stack((edges[..., :-1], edges[..., 1:]), axis=-1)
 
     # Compute freezing ratio
-    for ptc in protocol:
-        temp_session = freeze_or_not[previous_ptc:previous_ptc + ptc]
-        freezing_time = np.sum(temp_session)
-        freezing_ratio.append(100 * (freezing_time / ptc))
-        previous_ptc += ptc  # Update previous protocol duration
-    return np.array(freezing_ratio)
+    freezing_ratio, _ = compute_epoch_freezing_ratio(freeze_or_not, epochs, bin_duration)
+
+    return freezing_ratio
+
+
+def compute_freezing_time_course(freeze_or_not, window=10, step=1, align='left', partial=False, bin_duration=1):
+    # Parameter
+    # freeze_or_not [ndarr, 1D]: Result of 'detect_freezing'.
+    # window [int or float, Default=10 s]: Duration of the sliding window.
+    # step [int or float, Default=1 s]: Step between consecutive windows.
+    # align ['left', 'center' or 'right', Default='left']: Point of the window the time course is aligned to.
+    # partial [bool, Default=False]: Whether to keep the windows running over the end of the recording. Their ratio
+    #                                is normalized by the recorded duration.
+    # bin_duration [int or float, Default=1 s]: Duration of a speed bin used in 'compute_speed'.
+    # Return
+    # time [ndarr, 1D, in second]: Time of each window, aligned by 'align'.
+    # freezing_ratio [ndarr, 1D (Same length with time)]: The ratio of freezing in each window.
+
+    if align not in ('left', 'center', 'right'):
+        raise ValueError(f"Unknown align: '{align}'. Use 'left', 'center' or 'right'.")
+
+    # Window and step in bins
+    window_bins = max(int(round(window / bin_duration)), 1)
+    step_bins = max(int(round(step / bin_duration)), 1)
+
+    # Start of every window
+    n_bins = len(freeze_or_not)
+    last_start = n_bins - 1 if partial else n_bins - window_bins
+    start_bins = np.arange(0, last_start + 1, step_bins)
+
+    # Compute freezing ratio of every window in one pass
+    epochs = np.stack((start_bins, start_bins + window_bins), axis=-1) * bin_duration
+    freezing_ratio, _ = compute_epoch_freezing_ratio(freeze_or_not, epochs, bin_duration)
+
+    # Align time
+    offset = {'left': 0, 'center': window_bins / 2, 'right': window_bins}[align]
+    time = (start_bins + offset) * float(bin_duration)
+
+    return time, freezing_ratio
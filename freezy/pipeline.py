@@ -0,0 +1,172 @@
+import os
+import json
+from collections import OrderedDict
+
+import numpy as np
+
+from .extractor import extract_data, extract_coordinates, make_route
+from .filter import smooth_route
+from .speed import compute_speed
+from .freeze import estimate_freezing_threshold_by_method, detect_freezing, compute_freezing_ratio
+from .batch import make_parameters
+
+# Stages in order and the parameters each adds to its upstream key
+PIPELINE_STAGES = (
+    ('route', ('x_bodypart', 'y_bodypart')),
+    ('smoothed_route', ('window_size', 'order')),
+    ('speed', ('fps', 'pixel_per_cm', 'bin_duration')),
+    ('freezing_threshold', ('freezing_threshold_method', 'freezing_threshold')),
+    ('freeze_or_not', ('min_duration', 'max_gap')),
+    ('freezing_ratio', ('protocol',))
+)
+
+
+def _n_bytes(value):
+    # Memory of a cached stage output
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sum(_n_bytes(item) for item in value.values())
+    return 64
+
+
+def _read_only(value):
+    # Cached arrays are shared between callers
+    if isinstance(value, np.ndarray):
+        value.setflags(write=False)
+    elif isinstance(value, dict):
+        for item in value.values():
+            _read_only(item)
+    return value
+
+
+class Pipeline:
+    # extract_data -> make_route -> smooth_route -> compute_speed -> threshold -> detect_freezing ->
+    # compute_freezing_ratio with the output of every stage memoized in memory. A stage is keyed by the input file
+    # (path, size, mtime) and the parameters of itself and all upstream stages, so changing only the threshold or
+    # protocol reuses the stored speed. Entries are evicted least recently used beyond max_bytes.
+
+    def __init__(self, max_bytes=2 ** 28):
+        # Parameter
+        # max_bytes [int, Default=256 MiB]: Memory bound of the cached stage outputs.
+
+        self.max_bytes = max_bytes
+        self.n_bytes = 0
+        self.stats = {'hits': 0, 'misses': 0}
+        self._cache = OrderedDict()  # key -> (value, n_bytes)
+
+    def clear(self):
+        self._cache.clear()
+        self.n_bytes = 0
+
+    def _input_key(self, path):
+        stat = os.stat(path)
+        return [os.path.abspath(path), stat.st_size, stat.st_mtime_ns]
+
+    def _lookup(self, key):
+        if key not in self._cache:
+            return None
+        self._cache.move_to_end(key)
+        return self._cache[key][0]
+
+    def _store(self, key, value):
+        n_bytes = _n_bytes(value)
+        if n_bytes > self.max_bytes:
+            return value
+        self._cache[key] = (_read_only(value), n_bytes)
+        self.n_bytes += n_bytes
+
+        # Evict least recently used
+        while self.n_bytes > self.max_bytes:
+            _, (_, evicted_bytes) = self._cache.popitem(last=False)
+            self.n_bytes -= evicted_bytes
+        return value
+
+    def _memoize(self, key, compute):
+        value = self._lookup(key)
+        if value is not None:
+            self.stats['hits'] += 1
+            return value
+
+        self.stats['misses'] += 1
+        return self._store(key, compute())
+
+    def data(self, path, block_callback=None):
+        # Parameter
+        # path [str]: Path of DLC file.
+        # block_callback [callable, Default=None]: Passed to 'extract_data'; called after each block read from a
+        #                                          file not in the on-disk cache.
+        # Return
+        # data [dict]: Result of 'extract_data' with every bodypart.
+
+        key = json.dumps(['data', self._input_key(path)])
+        return self._memoize(key, lambda: extract_data(path, block_callback=block_callback))
+
+    def stage(self, name, path, parameters):
+        # Parameters
+        # name [str]: Stage in PIPELINE_STAGES.
+        # path [str]: Path of DLC file.
+        # parameters [dict]: Result of 'make_parameters'.
+        # Return
+        # value: Output of the stage, computed from the memoized upstream stages if needed.
+
+        names = [stage for stage, _ in PIPELINE_STAGES]
+        if name not in names:
+            raise ValueError(f"Unknown pipeline stage: {name}")
+
+        # Key of the stage covers every upstream parameter
+        key_values = [self._input_key(path)]
+        for stage, stage_parameters in PIPELINE_STAGES[:names.index(name) + 1]:
+            key_values.append([parameters[parameter] for parameter in stage_parameters])
+        key = json.dumps([name] + key_values, default=str)
+
+        return self._memoize(key, lambda: self._compute(name, path, parameters))
+
+    def _compute(self, name, path, parameters):
+        bin_duration = parameters['bin_duration']
+
+        if name == 'route':
+            x_bodypart, y_bodypart = parameters['x_bodypart'], parameters['y_bodypart']
+            data_key = json.dumps(['data', self._input_key(path)])
+            if data_key in self._cache:
+                data = self._lookup(data_key)
+            else:
+                data = extract_data(path, bodyparts=[x_bodypart, y_bodypart])
+            return make_route(*extract_coordinates(data, x_bodypart, y_bodypart))
+
+        if name == 'smoothed_route':
+            return smooth_route(self.stage('route', path, parameters), window_size=parameters['window_size'],
+                                order=parameters['order'])
+
+        if name == 'speed':
+            return compute_speed(self.stage('smoothed_route', path, parameters), fps=parameters['fps'],
+                                 pixel_per_cm=parameters['pixel_per_cm'], bin_duration=bin_duration)
+
+        if name == 'freezing_threshold':
+            if parameters['freezing_threshold'] is not None:
+                return float(parameters['freezing_threshold'])
+            return float(estimate_freezing_threshold_by_method(self.stage('speed', path, parameters),
+                                                               parameters['freezing_threshold_method']))
+
+        if name == 'freeze_or_not':
+            return detect_freezing(self.stage('speed', path, parameters),
+                                   self.stage('freezing_threshold', path, parameters),
+                                   min_duration=parameters['min_duration'], max_gap=parameters['max_gap'],
+                                   bin_duration=bin_duration)
+
+        return compute_freezing_ratio(self.stage('freeze_or_not', path, parameters), parameters['protocol'],
+                                      bin_duration=bin_duration)
+
+    def run(self, path, parameters=None, **kwargs):
+        # Parameters
+        # path [str]: Path of DLC file.
+        # parameters [dict, Default=None]: Parameters for 'make_parameters'.
+        # kwargs: Parameters overriding 'parameters'.
+        # Return
+        # result [dict]: Same keys as 'analyze_file'.
+
+        parameters = make_parameters(parameters, **kwargs)
+        result = {'path': path, 'parameters': parameters}
+        for name, _ in PIPELINE_STAGES:
+            result[name] = self.stage(name, path, parameters)
+        return result
@@ -45,24 +45,129 @@ def speed_per_pixel(binned_distance, fps, pixel_per_cm):
     return np.array(speed_per_bin)
 
 
-def compute_speed(route, fps=30, pixel_per_cm=30):
+def _frame_distance(route):
+    # Distance between consecutive frames of route [ndarr, 2D, (x, y)]
+    dx, dy = np.diff(route, axis=1)
+    return np.hypot(dx, dy)
+
+
+def _n_bins(n_distances, samples_per_bin, complete=False):
+    # The number of bins completed by n_distances, or started within them (the first distance of bin k is
+    # ceil(k * samples_per_bin), see '_bin_starts'); rounded to absorb floating point error
+    if complete:
+        return int(np.floor(np.round(n_distances / samples_per_bin, 9)))
+    if n_distances == 0:
+        return 0
+    return int(np.floor(np.round((n_distances - 1) / samples_per_bin, 9))) + 1
+
+
+def _bin_starts(first_bin, stop_bin, samples_per_bin):
+    # Index where each bin starts, taken from the bin timestamps so that fractional fps never drifts
+    return np.ceil(np.round(np.arange(first_bin, stop_bin) * samples_per_bin, 9)).astype(np.int64)
+
+
+def _sum_bins(distance, starts, samples_per_bin):
+    # Sum distance per bin starting at 'starts' (starts[0] == 0, ascending, at most len(distance))
+    if len(starts) == 0:
+        return np.empty((0,))
+
+    # Bins of an integer number of frames; full bins through a reshaped view, then the trailing partial bin
+    if float(samples_per_bin).is_integer():
+        bin_size = int(samples_per_bin)
+        n_full = len(distance) // bin_size * bin_size
+        distance_per_bin = np.sum(distance[:n_full].reshape(-1, bin_size), axis=1)
+        if n_full < len(distance):
+            distance_per_bin = np.append(distance_per_bin, np.sum(distance[n_full:]))
+        return distance_per_bin
+
+    # Bins of a fractional number of frames. A bin shorter than a frame can be empty (its start equals the next
+    # start or len(distance)); reduceat would return distance[start] for it, so it is set to 0.
+    ends = np.append(starts[1:], len(distance))
+    distance_per_bin = np.add.reduceat(np.append(distance, 0), starts)
+    distance_per_bin[ends <= starts] = 0
+    return distance_per_bin
+
+
+def compute_bin_edges(n_frames, fps=30, bin_duration=1):
     # Parameters
-    # route [list or ndarr, 2D, [x, y]]: Route of movement.
+    # n_frames [int]: The number of frames in the route.
     # fps [int or float, Default=30 fps]: Frame per second of video.
-    # pixel_per_cm [int, Default=30 pixels]: Pixels for 1 cm.
+    # bin_duration [int or float, Default=1 s]: Duration of a speed bin.
+    # Return
+    # bin_edges [ndarr, 1D, int]: Edges of the bins over the frame-to-frame distances (length n_frames - 1).
+    #                             Bin k covers distance[bin_edges[k]:bin_edges[k + 1]].
+
+    n_distances = max(n_frames - 1, 0)
+    samples_per_bin = fps * bin_duration
+    bin_starts = _bin_starts(0, _n_bins(n_distances, samples_per_bin), samples_per_bin)
+
+    return np.append(bin_starts, n_distances)
 
-    # Define position
-    x, y = route
-    pos1 = np.array([x[:-1], y[:-1]])
-    pos2 = np.array([x[1:], y[1:]])
+
+def compute_speed(route, fps=30, pixel_per_cm=30, bin_duration=1):
+    # Parameters
+    # route [list or ndarr, 2D, [x, y]]: Route of movement.
+    # fps [int or float, Default=30 fps]: Frame per second of video. Fractional frame rates (e.g. 29.97) are allowed.
+    # pixel_per_cm [int, Default=30 pixels]: Pixels for 1 cm.
+    # bin_duration [int or float, Default=1 s]: Duration of a speed bin. e.g. 0.25, 0.5, 2.
+    # Return
+    # speed_per_bin [ndarr, 1D]: Speed [cm/s] of each bin, including the trailing partial bin.
 
     # Compute distance
-    distance = euclidean_distance(pos1, pos2)
+    distance = _frame_distance(np.asarray(route, dtype=float))
 
-    # Binning distance
-    binned_distance = binning_distance(distance, int(fps))
+    # Sum distance per bin; bins start at the frame of their timestamp
+    samples_per_bin = fps * bin_duration
+    bin_starts = _bin_starts(0, _n_bins(len(distance), samples_per_bin), samples_per_bin)
+    distance_per_bin = _sum_bins(distance, bin_starts, samples_per_bin)
 
     # Compute speed
-    speed_per_bin = speed_per_pixel(binned_distance, int(fps), pixel_per_cm)
+    speed_per_bin = distance_per_bin / pixel_per_cm / bin_duration
 
     return speed_per_bin
+
+
+def iter_compute_speed(route_blocks, fps=30, pixel_per_cm=30, bin_duration=1):
+    # Parameters
+    # route_blocks [iterable of ndarr, 2D, (x, y)]: Consecutive blocks of route. e.g. Return of 'iter_smooth_route'.
+    # fps [int or float, Default=30 fps]: Frame per second of video.
+    # pixel_per_cm [int, Default=30 pixels]: Pixels for 1 cm.
+    # bin_duration [int or float, Default=1 s]: Duration of a speed bin.
+    # Yield
+    # speed_per_bin [ndarr, 1D]: Speed of the bins completed by each block. Concatenated, equal to
+    #                            'compute_speed'.
+
+    samples_per_bin = fps * bin_duration
+
+    # Carried over block boundaries: the last position and distances of the incomplete bin
+    last_position = None
+    partial_distance = np.empty((0,))
+    offset = 0  # Index of the first distance in partial_distance
+    next_bin = 0
+
+    for route in route_blocks:
+        if route.shape[1] == 0:
+            continue
+
+        # Compute distance including the step from the previous block
+        if last_position is not None:
+            route = np.concatenate((last_position, route), axis=1)
+        last_position = route[:, -1:]
+        distance = np.concatenate((partial_distance, _frame_distance(route)))
+
+        # Compute speed of the completed bins; bins shorter than a frame count once started, as in 'compute_speed'
+        n_complete = min(_n_bins(offset + len(distance), samples_per_bin, complete=True),
+                         _n_bins(offset + len(distance), samples_per_bin))
+        if n_complete > next_bin:
+            bin_starts = _bin_starts(next_bin, n_complete + 1, samples_per_bin) - offset
+            distance_per_bin = _sum_bins(distance[:bin_starts[-1]], bin_starts[:-1], samples_per_bin)
+            yield distance_per_bin / pixel_per_cm / bin_duration
+
+            distance = distance[bin_starts[-1]:]
+            offset += bin_starts[-1]
+            next_bin = n_complete
+        partial_distance = distance
+
+    # Compute speed of the trailing partial bin
+    if len(partial_distance) > 0:
+        yield _sum_bins(partial_distance, np.zeros(1, dtype=np.int64), samples_per_bin) / pixel_per_cm / bin_duration
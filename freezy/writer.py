@@ -0,0 +1,177 @@
+import os
+import json
+import importlib.util
+from contextlib import contextmanager
+
+import numpy as np
+
+
+def result_tables(result, frame_level=True):
+    # Parameters
+    # result [dict]: Result of 'analyze_file'.
+    # frame_level [bool, Default=True]: Include the frame-level 'Route' table (raw and smoothed route).
+
+    # Return
+    # tables [dict]: {'Data', 'Speed', ('Route',) 'Setup'} as DataFrames.
+
+    import pandas as pd
+
+    parameters = result['parameters']
+
+    tables = {
+        'Data': pd.DataFrame({
+            'Protocol (s)': list(parameters['protocol']),
+            'Freezing Threshold (cm/s)': result['freezing_threshold'],
+            'Freezing Ratio (%)': result['freezing_ratio']
+        }),
+        'Speed': pd.DataFrame({
+            'Speed (cm/s)': result['speed']
+        })
+    }
+
+    if frame_level:
+        route, smoothed_route = result['route'], result['smoothed_route']
+        tables['Route'] = pd.DataFrame({
+            'Route (X)': route[0],
+            'Route (Y)': route[1],
+            'Smoothed Route (X)': smoothed_route[0],
+            'Smoothed Route (Y)': smoothed_route[1]
+        })
+
+    tables['Setup'] = pd.DataFrame({
+        'Path': result['path'],
+        'Bodypart (X)': parameters['x_bodypart'],
+        'Bodypart (Y)': parameters['y_bodypart'],
+        'Window Size': parameters['window_size'],
+        'Order': parameters['order'],
+        'FPS': parameters['fps'],
+        'Pixel/cm': parameters['pixel_per_cm'],
+        'Bin (s)': parameters['bin_duration']
+    }, index=[0])
+
+    return tables
+
+
+@contextmanager
+def _atomic_path(path):
+    # Write to a temporary file next to path and move it in place when done, so a stopped or failed write never
+    # leaves a truncated file. The temporary file keeps the extension, which pandas uses to pick the engine.
+    stem, extension = os.path.splitext(path)
+    tmp_path = f"{stem}.{os.getpid()}.tmp{extension}"
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def table_path(save_path, table):
+    # Sibling file of a table other than 'Data', e.g. 'mouse1_freezy.speed.csv'
+    stem, extension = os.path.splitext(save_path)
+    return save_path if table == 'Data' else f"{stem}.{table.lower()}{extension}"
+
+
+def write_excel(result, save_path, frame_level=True):
+    # One workbook with a sheet per table; xlsxwriter is used when installed (faster than openpyxl)
+    import pandas as pd
+
+    engine = 'xlsxwriter' if importlib.util.find_spec('xlsxwriter') else None
+    with _atomic_path(save_path) as tmp_path:
+        with pd.ExcelWriter(tmp_path, engine=engine) as writer:
+            for table, df in result_tables(result, frame_level).items():
+                df.to_excel(writer, sheet_name=table, index=False)
+
+
+def write_csv(result, save_path, frame_level=True):
+    # 'Data' table in save_path, other tables in sibling files
+    for table, df in result_tables(result, frame_level).items():
+        with _atomic_path(table_path(save_path, table)) as tmp_path:
+            df.to_csv(tmp_path, index=False)
+
+
+def write_parquet(result, save_path, frame_level=True):
+    # 'Data' table in save_path, other tables in sibling files (requires pyarrow)
+    for table, df in result_tables(result, frame_level).items():
+        with _atomic_path(table_path(save_path, table)) as tmp_path:
+            df.to_parquet(tmp_path, index=False)
+
+
+def write_feather(result, save_path, frame_level=True):
+    # 'Data' table in save_path, other tables in sibling files (requires pyarrow)
+    for table, df in result_tables(result, frame_level).items():
+        with _atomic_path(table_path(save_path, table)) as tmp_path:
+            df.to_feather(tmp_path)
+
+
+def write_npz(result, save_path, frame_level=True):
+    # Every array in one compressed file; setup as JSON string
+    parameters = result['parameters']
+    arrays = {
+        'protocol': np.asarray(parameters['protocol'], dtype=float),
+        'freezing_threshold': np.asarray(result['freezing_threshold'], dtype=float),
+        'freezing_ratio': np.asarray(result['freezing_ratio'], dtype=float),
+        'speed': np.asarray(result['speed'])
+    }
+    if 'freeze_or_not' in result:
+        arrays['freeze_or_not'] = np.asarray(result['freeze_or_not'])
+    if frame_level:
+        arrays['route'] = np.asarray(result['route'])
+        arrays['smoothed_route'] = np.asarray(result['smoothed_route'])
+    arrays['setup'] = np.array(json.dumps({'path': result['path'], **parameters}, default=str))
+
+    with _atomic_path(save_path) as tmp_path:
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+
+
+def write_table(table, save_path):
+    # Parameters
+    # table [DataFrame]: Table to write, e.g. result of 'cohort_table'.
+    # save_path [str]: Path of .parquet, .feather or .csv file.
+
+    # Return
+    # save_path [str]: Path written. Without a Parquet engine (pyarrow or fastparquet), '.parquet' falls back to
+    #                  '.csv' next to it.
+
+    stem, extension = os.path.splitext(save_path)
+    if extension == '.parquet' and not (importlib.util.find_spec('pyarrow') or importlib.util.find_spec('fastparquet')):
+        save_path, extension = stem + '.csv', '.csv'
+
+    if extension not in ('.parquet', '.feather', '.csv'):
+        raise ValueError(f"Unsupported table file: {save_path} (use .parquet, .feather or .csv)")
+
+    with _atomic_path(save_path) as tmp_path:
+        if extension == '.parquet':
+            table.to_parquet(tmp_path, index=False)
+        elif extension == '.feather':
+            table.to_feather(tmp_path)
+        else:
+            table.to_csv(tmp_path, index=False)
+    return save_path
+
+
+# Name -> (extension, writer)
+OUTPUT_FORMATS = {
+    'excel': ('.xlsx', write_excel),
+    'parquet': ('.parquet', write_parquet),
+    'feather': ('.feather', write_feather),
+    'npz': ('.npz', write_npz),
+    'csv': ('.csv', write_csv)
+}
+
+
+def write_result(result, save_path, output_format='excel', frame_level=True):
+    # Parameters
+    # result [dict]: Result of 'analyze_file'.
+    # save_path [str]: Path of result file. Tabular formats other than Excel write the 'Data' table here and the
+    #                  other tables next to it ('<stem>.speed<ext>', ...).
+    # output_format [str, Default='excel']: Name in OUTPUT_FORMATS.
+    # frame_level [bool, Default=True]: Include the frame-level route. Omitting it makes Excel output much faster
+    #                                   and smaller for long recordings.
+
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output_format: {output_format}")
+
+    _, writer = OUTPUT_FORMATS[output_format]
+    writer(result, save_path, frame_level=frame_level)
@@ -0,0 +1,20 @@
+import numpy as np
+
+import freezy
+
+
+def test_smooth_route_in_place_float32():
+    # e.g. route of 'extract_data(..., dtype=np.float32)'
+    rng = np.random.default_rng(0)
+    route = np.cumsum(rng.standard_normal((2, 1000)), axis=1)
+    expected = freezy.smooth_route(route)
+
+    route_32 = route.astype(np.float32)
+    smoothed_route = freezy.smooth_route(route_32, out=route_32)
+    assert smoothed_route is route_32
+    np.testing.assert_allclose(route_32, expected, rtol=1e-4, atol=1e-3)
+
+    # Preallocated float32 output of a float64 route
+    out = np.empty(route.shape, dtype=np.float32)
+    freezy.smooth_route(route, out=out)
+    np.testing.assert_allclose(out, expected, rtol=1e-4, atol=1e-3)
@@ -0,0 +1,21 @@
+import numpy as np
+import pytest
+
+import freezy
+
+
+@pytest.mark.parametrize('n_bins', [20, 60, 100, 250, 1000, 100000])
+def test_kde_threshold_between_modes_for_short_and_long_recordings(n_bins):
+    # Freezing at 0.05 cm/s and moving at 10 cm/s; short recordings have a kernel longer than the histogram
+    rng = np.random.default_rng(0)
+    speed = np.where(rng.random(n_bins) < 0.5, 0.05, 10) * np.exp(rng.normal(0, 0.1, n_bins))
+
+    freezing_threshold = freezy.estimate_freezing_threshold_kde(speed)
+    assert 0.1 < freezing_threshold < 5
+
+
+def test_kde_threshold_any_length():
+    rng = np.random.default_rng(1)
+    for n_bins in range(2, 300):
+        speed = np.abs(rng.standard_normal(n_bins)) * rng.random() * 20
+        assert np.isfinite(freezy.estimate_freezing_threshold_kde(speed))
@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+
+import freezy
+
+
+@pytest.mark.parametrize('fps, bin_duration', [(29.97, 1), (30, 1), (29.97, 0.5), (59.94, 0.25), (2, 0.2)])
+def test_compute_speed_matches_bin_edges_and_iter(fps, bin_duration):
+    # Every recording length, including those whose last bin starts at len(distance) (e.g. 31 frames at 29.97 fps)
+    rng = np.random.default_rng(0)
+    for n_frames in range(0, 320):
+        route = rng.random((2, n_frames)) * 10
+        speed = freezy.compute_speed(route, fps=fps, pixel_per_cm=1, bin_duration=bin_duration)
+
+        # Same bins as 'compute_bin_edges'
+        distance = np.hypot(*np.diff(route, axis=1)) if n_frames > 1 else np.empty((0,))
+        edges = freezy.compute_bin_edges(n_frames, fps=fps, bin_duration=bin_duration)
+        expected = np.array([distance[start:stop].sum() for start, stop in zip(edges[:-1], edges[1:])])
+        np.testing.assert_allclose(speed * bin_duration, expected, atol=1e-9)
+
+        # Same bins when streamed in blocks
+        blocks = [route[:, start:start + 7] for start in range(0, n_frames, 7)]
+        streamed = list(freezy.iter_compute_speed(blocks, fps=fps, pixel_per_cm=1, bin_duration=bin_duration))
+        np.testing.assert_allclose(np.concatenate(streamed) if streamed else np.empty((0,)), speed, atol=1e-9)